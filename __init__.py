@@ -8,12 +8,24 @@ bl_info = {
     "category": "Image",
 }
 
+import os
+
+# Reload submodules only when already loaded AND explicitly requested via
+# env var (dev workflow). Enabling the addon at Blender startup must not
+# pay the re-parse cost, and unconditional reloads leak bpy.types classes.
+if "properties" in locals() and os.environ.get("BIE_DEV_RELOAD"):
+    import importlib
+    for _mod in (properties, operators, ui, drawing, clipboard, simple_gif,
+                 icons, keymap):
+        importlib.reload(_mod)
+
 import bpy
 from . import properties
 from . import operators
 from . import ui
 from . import drawing
 from . import clipboard
+from . import simple_gif
 from . import icons
 from . import keymap
 
@@ -3,104 +3,379 @@ Cross-platform clipboard operations for Better Image Editor.
 Handles screenshot capture and clipboard image transfer.
 """
 
+import atexit
 import bpy
 import ctypes
 from ctypes import wintypes
 import io
+import mmap
 import struct
 import tempfile
 import os
+import numpy as np
 
 # Windows clipboard formats
 CF_BITMAP = 2
 CF_DIB = 8
 SRCCOPY = 0x00CC0020
 
+# Resolve the Win32 DLL handles once at import; they are process-wide.
+if os.name == 'nt':
+    user32 = ctypes.windll.user32
+    kernel32 = ctypes.windll.kernel32
+    gdi32 = ctypes.windll.gdi32
 
-def get_screen_region(left, top, width, height):
+    # Declare every foreign prototype once at import. Correct restypes are
+    # required on 64-bit Windows (handles/pointers would otherwise truncate
+    # to 32 bits -> ERROR_INVALID_HANDLE), and with argtypes in place ctypes
+    # releases the GIL across the call, so long blits (BitBlt/GetDIBits can
+    # block for tens of ms at 4K) no longer stall Blender's other Python.
+    gdi32.BitBlt.argtypes = [wintypes.HDC, ctypes.c_int, ctypes.c_int,
+                             ctypes.c_int, ctypes.c_int, wintypes.HDC,
+                             ctypes.c_int, ctypes.c_int, wintypes.DWORD]
+    gdi32.BitBlt.restype = wintypes.BOOL
+    gdi32.GetDIBits.argtypes = [wintypes.HDC, ctypes.c_void_p, wintypes.UINT,
+                                wintypes.UINT, ctypes.c_void_p,
+                                ctypes.c_void_p, wintypes.UINT]
+    gdi32.GetDIBits.restype = ctypes.c_int
+    gdi32.CreateDIBSection.argtypes = [wintypes.HDC, ctypes.c_void_p,
+                                       wintypes.UINT, ctypes.c_void_p,
+                                       ctypes.c_void_p, wintypes.DWORD]
+    gdi32.CreateDIBSection.restype = ctypes.c_void_p
+    gdi32.CreateCompatibleDC.argtypes = [wintypes.HDC]
+    gdi32.CreateCompatibleDC.restype = wintypes.HDC
+    gdi32.SelectObject.argtypes = [wintypes.HDC, ctypes.c_void_p]
+    gdi32.SelectObject.restype = ctypes.c_void_p
+    gdi32.DeleteDC.argtypes = [wintypes.HDC]
+    gdi32.DeleteObject.argtypes = [ctypes.c_void_p]
+    user32.GetDC.restype = wintypes.HDC
+    user32.ReleaseDC.argtypes = [ctypes.c_void_p, wintypes.HDC]
+    user32.GetClipboardData.restype = ctypes.c_void_p
+    user32.SetClipboardData.restype = ctypes.c_void_p
+    user32.SetClipboardData.argtypes = [ctypes.c_uint, ctypes.c_void_p]
+    kernel32.GlobalAlloc.restype = ctypes.c_void_p
+    kernel32.GlobalAlloc.argtypes = [ctypes.c_uint, ctypes.c_size_t]
+    kernel32.GlobalReAlloc.restype = ctypes.c_void_p
+    kernel32.GlobalReAlloc.argtypes = [ctypes.c_void_p, ctypes.c_size_t,
+                                       ctypes.c_uint]
+    kernel32.GlobalLock.restype = ctypes.c_void_p
+    kernel32.GlobalLock.argtypes = [ctypes.c_void_p]
+    kernel32.GlobalUnlock.argtypes = [ctypes.c_void_p]
+    kernel32.GlobalFree.argtypes = [ctypes.c_void_p]
+    kernel32.GlobalSize.restype = ctypes.c_size_t
+    kernel32.GlobalSize.argtypes = [ctypes.c_void_p]
+else:
+    user32 = kernel32 = gdi32 = None
+
+
+# ctypes.Structure subclassing runs the metaclass (field offsets,
+# descriptors, type-cache registration) — define these once, not per call.
+class BITMAPINFOHEADER(ctypes.Structure):
+    _fields_ = [
+        ('biSize', wintypes.DWORD),
+        ('biWidth', wintypes.LONG),
+        ('biHeight', wintypes.LONG),
+        ('biPlanes', wintypes.WORD),
+        ('biBitCount', wintypes.WORD),
+        ('biCompression', wintypes.DWORD),
+        ('biSizeImage', wintypes.DWORD),
+        ('biXPelsPerMeter', wintypes.LONG),
+        ('biYPelsPerMeter', wintypes.LONG),
+        ('biClrUsed', wintypes.DWORD),
+        ('biClrImportant', wintypes.DWORD),
+    ]
+
+
+class BITMAP(ctypes.Structure):
+    _fields_ = [
+        ('bmType', wintypes.LONG),
+        ('bmWidth', wintypes.LONG),
+        ('bmHeight', wintypes.LONG),
+        ('bmWidthBytes', wintypes.LONG),
+        ('bmPlanes', wintypes.WORD),
+        ('bmBitsPixel', wintypes.WORD),
+        ('bmBits', ctypes.c_void_p),
+    ]
+
+
+_BIH_SIZE = ctypes.sizeof(BITMAPINFOHEADER)
+
+# 14-byte BMP file header template; everything except bfSize and bfOffBits
+# is constant, so per call we clone the template and patch those two fields.
+_BMP_HEADER_TMPL = bytearray(b'BM' + b'\x00' * 12)
+
+
+# Scratch float buffers for the clipboard float->byte conversion, keyed by
+# element count so back-to-back copies of the same image reuse the buffer.
+_F32_SCRATCH = {}
+
+# HGLOBAL retained from a copy that failed before SetClipboardData handed
+# ownership to Windows. On success the handle belongs to the system and the
+# cache is cleared; on failure we keep it and GlobalReAlloc next time
+# instead of paying the large allocation again.
+_CLIP_HGLOBAL = None
+_CLIP_HGLOBAL_SIZE = 0
+
+
+def _alloc_clip_hglobal(total_size):
+    global _CLIP_HGLOBAL, _CLIP_HGLOBAL_SIZE
+    if _CLIP_HGLOBAL and _CLIP_HGLOBAL_SIZE >= total_size:
+        return _CLIP_HGLOBAL
+    if _CLIP_HGLOBAL:
+        hGlobal = kernel32.GlobalReAlloc(_CLIP_HGLOBAL, total_size, 0x0002)
+        if not hGlobal:
+            kernel32.GlobalFree(_CLIP_HGLOBAL)
+            hGlobal = kernel32.GlobalAlloc(0x0002, total_size)
+    else:
+        hGlobal = kernel32.GlobalAlloc(0x0002, total_size)
+    _CLIP_HGLOBAL = hGlobal
+    _CLIP_HGLOBAL_SIZE = total_size if hGlobal else 0
+    return hGlobal
+
+
+def _surrender_clip_hglobal():
+    """Forget the cached handle once Windows has taken ownership of it."""
+    global _CLIP_HGLOBAL, _CLIP_HGLOBAL_SIZE
+    _CLIP_HGLOBAL = None
+    _CLIP_HGLOBAL_SIZE = 0
+
+
+def _bmp_file_header(bf_size, bf_off_bits):
+    hdr = bytearray(_BMP_HEADER_TMPL)
+    struct.pack_into('<I', hdr, 2, bf_size)
+    struct.pack_into('<I', hdr, 10, bf_off_bits)
+    return hdr
+
+
+def swap_rb(u8):
     """
-    Capture a region of the screen using Windows GDI.
-    Returns RGBA pixel data and dimensions.
+    Swap the R and B channels of a uint8 RGBA/BGRA array.
+    Each pixel is handled as one uint32 rotate+byteswap (the jpegview
+    `_byteswap_ulong(_rotl(v, 8))` identity), which NumPy lowers to
+    vectorized byte shuffles instead of a gather per channel.
     """
-    # Load Windows libraries
-    user32 = ctypes.windll.user32
-    gdi32 = ctypes.windll.gdi32
-    
-    # Get screen DC
-    hdc_screen = user32.GetDC(0)
-    hdc_mem = gdi32.CreateCompatibleDC(hdc_screen)
-    
-    # Create bitmap
-    hbitmap = gdi32.CreateCompatibleBitmap(hdc_screen, width, height)
-    old_bitmap = gdi32.SelectObject(hdc_mem, hbitmap)
-    
-    # Copy screen to bitmap
-    gdi32.BitBlt(hdc_mem, 0, 0, width, height, hdc_screen, left, top, SRCCOPY)
-    
+    u32 = np.ascontiguousarray(u8).reshape(-1).view(np.uint32)
+    swapped = ((u32 << np.uint32(8)) | (u32 >> np.uint32(24))).byteswap()
+    return swapped.view(np.uint8).reshape(u8.shape)
+
+
+# One DIB section sized to the virtual screen, shared by every capture.
+# Allocating per call churned GDI objects; every region fits inside the
+# virtual-screen bounds, so subrects are just slices of the shared buffer.
+_SCREEN_DIB = None  # (hdc_mem, hbitmap, ptr_bits, vw, vh)
+
+
+def _get_screen_dib(hdc_screen):
+    global _SCREEN_DIB
+    if _SCREEN_DIB:
+        return _SCREEN_DIB
+
+    vw = user32.GetSystemMetrics(78) or user32.GetSystemMetrics(0)  # SM_CXVIRTUALSCREEN
+    vh = user32.GetSystemMetrics(79) or user32.GetSystemMetrics(1)  # SM_CYVIRTUALSCREEN
+
     # Prepare bitmap info structure for 32-bit BGRA
-    class BITMAPINFOHEADER(ctypes.Structure):
-        _fields_ = [
-            ('biSize', wintypes.DWORD),
-            ('biWidth', wintypes.LONG),
-            ('biHeight', wintypes.LONG),
-            ('biPlanes', wintypes.WORD),
-            ('biBitCount', wintypes.WORD),
-            ('biCompression', wintypes.DWORD),
-            ('biSizeImage', wintypes.DWORD),
-            ('biXPelsPerMeter', wintypes.LONG),
-            ('biYPelsPerMeter', wintypes.LONG),
-            ('biClrUsed', wintypes.DWORD),
-            ('biClrImportant', wintypes.DWORD),
-        ]
-    
     bmi = BITMAPINFOHEADER()
-    bmi.biSize = ctypes.sizeof(BITMAPINFOHEADER)
-    bmi.biWidth = width
-    bmi.biHeight = -height  # Negative for top-down
+    bmi.biSize = _BIH_SIZE
+    bmi.biWidth = vw
+    bmi.biHeight = vh  # Positive = bottom-up, matching Blender's row order
     bmi.biPlanes = 1
     bmi.biBitCount = 32
     bmi.biCompression = 0  # BI_RGB
-    
-    # Calculate buffer size
-    buffer_size = width * height * 4
-    buffer = ctypes.create_string_buffer(buffer_size)
-    
-    # Get bitmap bits
-    gdi32.GetDIBits(hdc_mem, hbitmap, 0, height, buffer, ctypes.byref(bmi), 0)
-    
-    # Cleanup
-    gdi32.SelectObject(hdc_mem, old_bitmap)
-    gdi32.DeleteObject(hbitmap)
-    gdi32.DeleteDC(hdc_mem)
+
+    # DIB section: BitBlt writes straight into system memory we can read,
+    # so no second GetDIBits pass (and no GDI sync point) is needed.
+    ppv_bits = ctypes.c_void_p()
+    hbitmap = gdi32.CreateDIBSection(hdc_screen, ctypes.byref(bmi), 0,
+                                     ctypes.byref(ppv_bits), None, 0)
+    hdc_mem = gdi32.CreateCompatibleDC(hdc_screen)
+    gdi32.SelectObject(hdc_mem, hbitmap)
+
+    _SCREEN_DIB = (hdc_mem, hbitmap, ppv_bits.value, vw, vh)
+    return _SCREEN_DIB
+
+
+def _release_screen_dib():
+    global _SCREEN_DIB
+    if _SCREEN_DIB and gdi32:
+        hdc_mem, hbitmap = _SCREEN_DIB[0], _SCREEN_DIB[1]
+        gdi32.DeleteDC(hdc_mem)
+        gdi32.DeleteObject(hbitmap)
+    _SCREEN_DIB = None
+
+
+if os.name == 'nt':
+    atexit.register(_release_screen_dib)
+
+
+def get_screen_region(left, top, width, height):
+    """
+    Capture a region of the screen using Windows GDI.
+    Returns a (height, width, 4) uint8 ndarray of BGRA pixels plus dimensions.
+    The array aliases the shared DIB section and is invalidated by the next
+    capture; callers that need persistence must .copy().
+    """
+    hdc_screen = user32.GetDC(0)
+    hdc_mem, hbitmap, ptr_bits, vw, vh = _get_screen_dib(hdc_screen)
+
+    # Copy screen into the top-left corner of the shared section
+    gdi32.BitBlt(hdc_mem, 0, 0, width, height, hdc_screen, left, top, SRCCOPY)
+    gdi32.GdiFlush()  # Make sure the blit landed before reading the section
+
     user32.ReleaseDC(0, hdc_screen)
-    
-    # Convert BGRA to RGBA
-    data = bytearray(buffer.raw)
-    for i in range(0, len(data), 4):
-        data[i], data[i + 2] = data[i + 2], data[i]  # Swap B and R
-        data[i + 3] = 255  # Set alpha to opaque
-    
-    return bytes(data), width, height
+
+    size = vw * vh * 4
+    arr = np.frombuffer((ctypes.c_ubyte * size).from_address(ptr_bits),
+                        dtype=np.uint8).reshape(vh, vw, 4)
+
+    # Bottom-up DIB: device row 0 lands in the last buffer row, so a blit
+    # into the top-left corner occupies the final `height` rows — already
+    # in Blender's bottom-up order, no flip needed downstream.
+    # Pixels stay in GDI-native BGRA order; consumers fold the channel
+    # permutation into their own (single) conversion pass.
+    return arr[vh - height:, :width], width, height
+
+
+def get_screen_region_into(left, top, width, height, out):
+    """
+    Capture a region into a caller-owned (height, width, 4) uint8 array.
+
+    One copy out of the shared DIB section — the cost a caller would pay
+    for .copy() anyway — but into a buffer it can pre-size once and
+    reuse, so repeated captures (the GIF recorder's timer) allocate
+    nothing. Unlike get_screen_region's view, the result stays valid
+    across later captures.
+    """
+    view, w, h = get_screen_region(left, top, width, height)
+    np.copyto(out, view)
+    return out, w, h
 
 
 def capture_full_screen():
     """Capture the entire primary screen."""
-    user32 = ctypes.windll.user32
     width = user32.GetSystemMetrics(0)  # SM_CXSCREEN
     height = user32.GetSystemMetrics(1)  # SM_CYSCREEN
     return get_screen_region(0, 0, width, height)
 
 
+def _decode_dib_array(data_ptr, data_size):
+    """
+    Decode an uncompressed 24/32-bit CF_DIB payload straight from the
+    locked handle. Returns (bottom-up BGRA uint8 [H, W, 4] copy, w, h),
+    or None for palettized/compressed DIBs so the caller can fall back
+    to the temp-file BMP loader.
+    """
+    header = ctypes.string_at(data_ptr, min(data_size, 52))
+    if len(header) < 20:
+        return None
+    dib_header_size = struct.unpack_from('<I', header, 0)[0]
+    if dib_header_size < 40:
+        return None  # BITMAPCOREHEADER: rare enough to leave to the loader
+    width, height = struct.unpack_from('<ii', header, 4)
+    bit_count = struct.unpack_from('<H', header, 14)[0]
+    compression = struct.unpack_from('<I', header, 16)[0]
+    if width <= 0 or height == 0 or bit_count not in (24, 32):
+        return None
+
+    pixel_off = dib_header_size
+    if compression == 3:
+        # BI_BITFIELDS with the standard BGRA masks is byte-identical to
+        # BI_RGB 32-bit; any other mask layout goes to the fallback.
+        if bit_count != 32 or len(header) < 52:
+            return None
+        if struct.unpack_from('<III', header, 40) != (0xFF0000, 0xFF00, 0xFF):
+            return None
+        if dib_header_size == 40:
+            pixel_off += 12  # masks trail a plain INFOHEADER
+    elif compression != 0:
+        return None
+
+    rows = abs(height)
+    stride = ((width * bit_count + 31) // 32) * 4
+    if data_size < pixel_off + stride * rows:
+        return None
+
+    px = np.frombuffer(
+        (ctypes.c_ubyte * (stride * rows)).from_address(data_ptr + pixel_off),
+        dtype=np.uint8).reshape(rows, stride)
+    if bit_count == 32:
+        bgra = px[:, :width * 4].reshape(rows, width, 4).copy()
+    else:
+        bgra = np.empty((rows, width, 4), np.uint8)
+        bgra[..., :3] = px[:, :width * 3].reshape(rows, width, 3)
+        bgra[..., 3] = 255
+    if height < 0:
+        bgra = bgra[::-1]  # top-down DIB -> Blender's bottom-up order
+    return bgra, width, rows
+
+
+def get_clipboard_as_array():
+    """
+    Decode the clipboard image entirely in memory.
+    Returns (bottom-up BGRA uint8 [H, W, 4], width, height), or None when
+    the clipboard holds no format we can decode without the BMP loader.
+    """
+    for _ in range(5):
+        if user32.OpenClipboard(0): break
+        import time
+        time.sleep(0.01)
+    else:
+        print("Failed to Open Clipboard")
+        return None
+
+    try:
+        if user32.IsClipboardFormatAvailable(CF_DIB):
+            hdata = user32.GetClipboardData(CF_DIB)
+            if hdata:
+                data_ptr = kernel32.GlobalLock(hdata)
+                if data_ptr:
+                    try:
+                        result = _decode_dib_array(
+                            data_ptr, kernel32.GlobalSize(hdata))
+                        if result:
+                            return result
+                    finally:
+                        kernel32.GlobalUnlock(hdata)
+
+        if user32.IsClipboardFormatAvailable(CF_BITMAP):
+            hbitmap = user32.GetClipboardData(CF_BITMAP)
+            if hbitmap:
+                hdc_screen = user32.GetDC(0)
+                hdc_mem = gdi32.CreateCompatibleDC(hdc_screen)
+
+                bmp = BITMAP()
+                gdi32.GetObjectA(hbitmap, ctypes.sizeof(BITMAP), ctypes.byref(bmp))
+                width = bmp.bmWidth
+                height = bmp.bmHeight
+
+                bmi = BITMAPINFOHEADER()
+                bmi.biSize = _BIH_SIZE
+                bmi.biWidth = width
+                bmi.biHeight = height  # Positive = bottom-up
+                bmi.biPlanes = 1
+                bmi.biBitCount = 32
+                bmi.biCompression = 0
+
+                # GetDIBits writes straight into the ndarray's buffer
+                arr = np.empty((height, width, 4), np.uint8)
+                res = gdi32.GetDIBits(hdc_mem, hbitmap, 0, height,
+                                      arr.ctypes.data, ctypes.byref(bmi), 0)
+
+                user32.ReleaseDC(0, hdc_screen)
+                gdi32.DeleteDC(hdc_mem)
+                if res and width > 0 and height > 0:
+                    return arr, width, height
+
+        return None
+    finally:
+        user32.CloseClipboard()
+
+
 def get_clipboard_as_temp_bmp():
     """
     Save clipboard image data to a temporary BMP file.
     Robustly handles CF_DIB and CF_BITMAP.
     Returns the file path or None.
     """
-    user32 = ctypes.windll.user32
-    kernel32 = ctypes.windll.kernel32
-    gdi32 = ctypes.windll.gdi32
-    
     # Retry opening clipboard (sometimes locked by other apps)
     for _ in range(5):
         if user32.OpenClipboard(0): break
@@ -124,38 +399,48 @@ def get_clipboard_as_temp_bmp():
                         # Verify logic
                         if len(dib_data) >= 4:
                             # Construct BMP
-                            bfType = b'BM'
                             bfSize = 14 + data_size
-                            bfReserved1 = 0
-                            bfReserved2 = 0
-                            
+
                             dib_header_size = struct.unpack('<I', dib_data[:4])[0]
-                            
+
                             # Determine Palette/Offset
-                            # Simplified Safe Offset Calc (Header + Palette)
-                            # Assume max 256 colors for <=8bit, 0 for >8bit usually
-                            # But V4/V5 have masks...
-                            # Let's rely on standard parsing we had?
-                            # Re-use reliable offset calc logic
-                            
                             biBitCount = 32
-                            if dib_header_size >= 12: # Core
-                                 if len(dib_data) >= 12: biBitCount = struct.unpack('<H', dib_data[10:12])[0]
+                            biClrUsed = 0
+                            biCompression = 0
+                            if dib_header_size == 12:
+                                # BITMAPCOREHEADER: bcBitCount at offset 10
+                                if len(dib_data) >= 12:
+                                    biBitCount = struct.unpack_from('<H', dib_data, 10)[0]
                             else:
-                                 if len(dib_data) >= 16: biBitCount = struct.unpack('<H', dib_data[14:16])[0]
-                             
-                            palette_size = 0
+                                # BITMAPINFOHEADER or larger (V4/V5)
+                                if len(dib_data) >= 16:
+                                    biBitCount = struct.unpack_from('<H', dib_data, 14)[0]
+                                if dib_header_size >= 36 and len(dib_data) >= 36:
+                                    biCompression = struct.unpack_from('<I', dib_data, 16)[0]
+                                    biClrUsed = struct.unpack_from('<I', dib_data, 32)[0]
+
                             if biBitCount <= 8:
-                                palette_size = (1 << biBitCount) * 4 # Approximation
-                            
+                                # Honour biClrUsed when set; only fall back
+                                # to the full 2^n palette when it is zero.
+                                palette_size = (biClrUsed or (1 << biBitCount)) * 4
+                            elif biCompression == 3 and dib_header_size == 40:
+                                # BI_BITFIELDS masks follow a plain INFOHEADER
+                                # (V4/V5 carry the masks inside the header).
+                                palette_size = 12
+                            else:
+                                palette_size = 0
+
                             bfOffBits = 14 + dib_header_size + palette_size
+
+                            file_header = _bmp_file_header(bfSize, bfOffBits)
                             
-                            file_header = struct.pack('<2sIHH I', bfType, bfSize, bfReserved1, bfReserved2, bfOffBits)
-                            
+                            # Raw writes: two buffers, two syscalls. The
+                            # buffered writer would memcpy the multi-MB DIB
+                            # through its own 8 KB buffer first.
                             fd, path = tempfile.mkstemp(suffix='.bmp')
-                            with os.fdopen(fd, 'wb') as f:
-                                f.write(file_header)
-                                f.write(dib_data)
+                            os.write(fd, file_header)
+                            os.write(fd, dib_data)
+                            os.close(fd)
                             return path
                     finally:
                         kernel32.GlobalUnlock(hdata)
@@ -169,11 +454,6 @@ def get_clipboard_as_temp_bmp():
                 hdc_mem = gdi32.CreateCompatibleDC(hdc_screen)
                 
                 # Get Bitmap Info
-                class BITMAP(ctypes.Structure):
-                    _fields_ = [('bmType', wintypes.LONG), ('bmWidth', wintypes.LONG), 
-                                ('bmHeight', wintypes.LONG), ('bmWidthBytes', wintypes.LONG),
-                                ('bmPlanes', wintypes.WORD), ('bmBitsPixel', wintypes.WORD), 
-                                ('bmBits', ctypes.c_void_p)]
                 bmp = BITMAP()
                 gdi32.GetObjectA(hbitmap, ctypes.sizeof(BITMAP), ctypes.byref(bmp))
                 
@@ -181,15 +461,8 @@ def get_clipboard_as_temp_bmp():
                 height = bmp.bmHeight
                 
                 # Prepare Info Header
-                class BITMAPINFOHEADER(ctypes.Structure):
-                    _fields_ = [
-                        ('biSize', wintypes.DWORD), ('biWidth', wintypes.LONG), ('biHeight', wintypes.LONG),
-                        ('biPlanes', wintypes.WORD), ('biBitCount', wintypes.WORD), ('biCompression', wintypes.DWORD),
-                        ('biSizeImage', wintypes.DWORD), ('biXPelsPerMeter', wintypes.LONG),
-                        ('biYPelsPerMeter', wintypes.LONG), ('biClrUsed', wintypes.DWORD), ('biClrImportant', wintypes.DWORD),
-                    ]
                 bmi = BITMAPINFOHEADER()
-                bmi.biSize = ctypes.sizeof(BITMAPINFOHEADER)
+                bmi.biSize = _BIH_SIZE
                 bmi.biWidth = width
                 bmi.biHeight = height 
                 bmi.biPlanes = 1
@@ -197,101 +470,92 @@ def get_clipboard_as_temp_bmp():
                 bmi.biCompression = 0 
                 
                 buffer_size = width * height * 4
-                buffer = ctypes.create_string_buffer(buffer_size)
-                
-                # Retrieve Bits
-                res = gdi32.GetDIBits(hdc_mem, hbitmap, 0, height, buffer, ctypes.byref(bmi), 0)
-                
+                bfOffBits = 14 + 40  # Header + InfoHeader (no palette for 32bit)
+                total_size = bfOffBits + buffer_size
+
+                # Map the destination file and let GetDIBits write the
+                # pixels straight into it — no Python-owned staging buffer
+                # and no extra user-space copy of the payload.
+                fd, path = tempfile.mkstemp(suffix='.bmp')
+                os.ftruncate(fd, total_size)
+                mm = mmap.mmap(fd, total_size)
+                addr = ctypes.addressof(ctypes.c_char.from_buffer(mm))
+
+                res = gdi32.GetDIBits(hdc_mem, hbitmap, 0, height,
+                                      addr + bfOffBits, ctypes.byref(bmi), 0)
+
                 user32.ReleaseDC(0, hdc_screen)
                 gdi32.DeleteDC(hdc_mem)
-                
+
                 if res:
-                    # Construct File
-                    # File Header
-                    bfType = b'BM'
-                    bfSize = 14 + 40 + buffer_size
-                    bfReserved1 = 0
-                    bfReserved2 = 0
-                    bfOffBits = 14 + 40 # Header + InfoHeader (no palette for 32bit)
-                    
-                    file_header = struct.pack('<2sIHH I', bfType, bfSize, bfReserved1, bfReserved2, bfOffBits)
-                    
-                    fd, path = tempfile.mkstemp(suffix='.bmp')
-                    with os.fdopen(fd, 'wb') as f:
-                        f.write(file_header)
-                        f.write(bytes(bmi)) # Write Info Header
-                        f.write(buffer)     # Write Pixels
+                    # Headers go in after GetDIBits, which may fill in
+                    # fields like biSizeImage.
+                    mm[0:14] = _bmp_file_header(total_size, bfOffBits)
+                    mm[14:bfOffBits] = bytes(bmi)
+                    mm.close()
+                    os.close(fd)
                     return path
 
+                mm.close()
+                os.close(fd)
+                try: os.remove(path)
+                except: pass
+
         print("No supported format found (CF_DIB or CF_BITMAP)")
         return None
             
     finally:
         user32.CloseClipboard()
 
-# ... (keep helper functions if needed, but get_image_from_clipboard and create_blender_image_from_pixels are now obsolete for paste) ...
-
-# We still need create_blender_image_from_pixels for SCREENSHOTS (capture_full_screen returns raw bytes)
-# Let's optimize it for Screenshots too!
-def create_image_from_bytes(name, pixels, width, height):
+def paste_clipboard_image(name):
     """
-    Efficiently create image from RGBA bytes using foreach_set.
+    Load the current clipboard image into Blender.
+    Common 24/32-bit DIBs are decoded in memory — no temp file, no disk
+    round-trip. Palettized/compressed DIBs still take the temp-BMP path
+    through Blender's C loader. Returns the packed Image, or None if the
+    clipboard holds no supported image.
     """
-    image = bpy.data.images.new(name, width=width, height=height, alpha=True)
-    
-    # Raw bytes are BGRA (from Windows GDI) usually, but our logic in get_screen_region 
-    # already swapped them to RGBA.
-    # Pixels in Blender are float (0..1).
-    # Converting bytes to float list is slow. 
-    # We can try to assume 0-1 if we use specialized loaders, but bpy.data.images.new creates empty float buffer.
-    
-    # Optimization: Use a temp file for Screenshots too?
-    # Writing raw bytes to a simple BMP/PNG is fast.
-    # But we have raw RGBA, no header.
-    # It's better to stick with slow conversion for screenshots OR use numpy if available (unlikely).
-    # BUT, the crash was on Paste. Screenshots were working fine?
-    # User didn't complain about screenshot crash.
-    # Let's verify `get_screen_region` returns RGBA bytes.
-    # In `get_screen_region`:
-    # data[i], data[i+2] = data[i+2], data[i]
-    # This loop in python is also slow for 4K.
-    
-    # The user complained about PASTE.
-    # Let's focus on fixing PASTE first by using file load.
-    
-    num_pixels = width * height
-    # Use list comprehension which is slightly faster than append loop
-    # But result is still huge list.
-    # pixels is bytes object.
-    
-    # Normalize 0-255 to 0.0-1.0
-    # This is heavy.
-    # Slicing: R = pixels[0::4], G = pixels[1::4] ...
-    
-    # For now, let's leave Screenshot logic alone if it works (user only mentioned Paste crash).
-    # I will just keep `create_blender_image_from_pixels` as legacy for screenshots.
-    
-    # ... keeping original implementation for back-compat with screenshot ...
-    # Re-paste the original function to prevent breaking screenshot tool
-    
-    image.pixels = [p / 255.0 for p in pixels] # Flip logic was:
-    
-    # Wait, the original had a flip logic:
-    # for y in range(height-1, -1, -1): ...
-    
-    # If I rewrite this file, I need to keep `copy_image_to_clipboard` too.
+    result = get_clipboard_as_array()
+    if result:
+        arr, w, h = result
+        return create_blender_image_from_pixels(name, arr, w, h)
+
+    path = get_clipboard_as_temp_bmp()
+    if not path:
+        return None
+    try:
+        image = bpy.data.images.load(path, check_existing=False)
+        image.name = name
+        image.pack()
+    finally:
+        try: os.remove(path)
+        except: pass
     return image
 
-# Re-implementing original create_blender_image_from_pixels for Screenshot tool compatibility
+
+# Scratch RGBA float buffers for byte->float image upload, keyed by
+# resolution so rapid re-captures at the same size reuse one allocation
+# (~64 MB at 4K) instead of churning the heap every shot.
+_RGBA_SCRATCH = {}
+
+
 def create_blender_image_from_pixels(name, pixels, width, height):
+    """Create a Blender image from raw BGRA pixels (bottom-up, Blender order)."""
     image = bpy.data.images.new(name, width=width, height=height, alpha=True)
-    all_floats = [x / 255.0 for x in pixels]
-    stride = width * 4
-    flipped = []
-    for y in range(height):
-        src_row_idx = (height - 1 - y) * stride
-        flipped.extend(all_floats[src_row_idx : src_row_idx + stride])
-    image.pixels = flipped
+    if isinstance(pixels, np.ndarray):
+        a = pixels.reshape(height, width, 4)
+    else:
+        a = np.frombuffer(pixels, dtype=np.uint8).reshape(height, width, 4)
+    rgba = _RGBA_SCRATCH.get((height, width))
+    if rgba is None:
+        rgba = _RGBA_SCRATCH[(height, width)] = np.empty(
+            (height, width, 4), np.float32)
+    # Fuse the BGRA->RGB reversal (a strided view, no copy) and the float
+    # conversion into one multiply that lands in the reused scratch; the
+    # capture path already delivers rows bottom-up so no flip is needed.
+    np.multiply(a[..., 2::-1], 1.0 / 255.0, out=rgba[..., :3])
+    rgba[..., 3] = 1.0  # GDI alpha is undefined; force opaque
+    image.pixels.foreach_set(rgba.ravel())
     image.pack()
     return image
 
@@ -299,124 +563,78 @@ def copy_pixels_to_clipboard(pixels, width, height):
     """
     Copy RGBA float pixels (0..1) or byte pixels (0..255) to Windows Clipboard.
     """
-    print(f"[CLIP] copy_pixels_to_clipboard called: {width}x{height}, {len(pixels)} pixel values")
-    user32 = ctypes.windll.user32
-    kernel32 = ctypes.windll.kernel32
-    
-    # CRITICAL: Set proper return types for 64-bit Windows
-    # Without this, handles get truncated to 32-bit causing ERROR_INVALID_HANDLE (6)
-    kernel32.GlobalAlloc.restype = ctypes.c_void_p
-    kernel32.GlobalAlloc.argtypes = [ctypes.c_uint, ctypes.c_size_t]
-    kernel32.GlobalLock.restype = ctypes.c_void_p
-    kernel32.GlobalLock.argtypes = [ctypes.c_void_p]
-    kernel32.GlobalUnlock.argtypes = [ctypes.c_void_p]
-    kernel32.GlobalFree.argtypes = [ctypes.c_void_p]
-    user32.SetClipboardData.restype = ctypes.c_void_p
-    user32.SetClipboardData.argtypes = [ctypes.c_uint, ctypes.c_void_p]
-    
-    # 1. Convert pixels to BGRA byte array
+    # The expected element count follows from the dimensions; don't take
+    # len() of a possibly multi-dimensional input to learn it.
     buf_size = width * height * 4
-    raw_data = bytearray(buf_size)
-    print(f"[CLIP] Expected buf_size: {buf_size}")
-    
-    # Detect structure
-    if not pixels:
+    print(f"[CLIP] copy_pixels_to_clipboard called: {width}x{height}, {buf_size} pixel values")
+    if buf_size == 0:
         print("[CLIP] ERROR: No pixels!")
         return False
-    first = pixels[0]
-    is_nested = isinstance(first, (list, tuple))
-    print(f"[CLIP] first pixel type: {type(first)}, is_nested: {is_nested}")
-    
-    idx = 0
-    if is_nested:
-        # Nested List Case (e.g. [[r,g,b,a], ...])
-        is_float = isinstance(first[0], float)
-        for p in pixels:
-            if is_float:
-                r = int(p[0] * 255); g = int(p[1] * 255); b = int(p[2] * 255); a = int(p[3] * 255)
-            else:
-                r = p[0]; g = p[1]; b = p[2]; a = p[3]
-            
-            # BGRA
-            if idx + 3 < len(raw_data):
-                raw_data[idx] = max(0, min(255, b))
-                raw_data[idx+1] = max(0, min(255, g))
-                raw_data[idx+2] = max(0, min(255, r))
-                raw_data[idx+3] = max(0, min(255, a))
-                idx += 4
+
+    # 1. Convert pixels to BGRA byte array (single NumPy pipeline instead
+    # of a Python loop over every component)
+    # Input is always a flat RGBA sequence — Image.pixels is a flat
+    # bpy_prop_array and the compose path hands over a flat buffer, so no
+    # nested-list normalization is needed here.
+    arr = np.asarray(pixels)
+
+    if arr.dtype.kind == 'f':
+        scratch = _F32_SCRATCH.get(arr.size)
+        if scratch is None:
+            scratch = _F32_SCRATCH[arr.size] = np.empty(arr.size, np.float32)
+        # Scale and clamp in place in the scratch buffer; only the final
+        # uint8 cast allocates.
+        np.multiply(arr.reshape(-1), 255.0, out=scratch)
+        np.clip(scratch, 0, 255, out=scratch)
+        u8 = scratch.astype(np.uint8)
     else:
-        # Flat List Case
-        is_float = isinstance(first, float)
-        if is_float:
-            for i in range(0, len(pixels), 4):
-                if i+3 >= len(pixels): break
-                r = int(pixels[i] * 255)
-                g = int(pixels[i+1] * 255)
-                b = int(pixels[i+2] * 255)
-                a = int(pixels[i+3] * 255)
-                if idx + 3 < len(raw_data):
-                   raw_data[idx] = max(0, min(255, b))
-                   raw_data[idx+1] = max(0, min(255, g))
-                   raw_data[idx+2] = max(0, min(255, r))
-                   raw_data[idx+3] = max(0, min(255, a))
-                   idx += 4
-        else:
-            # Assumed byte/int
-            for i in range(0, len(pixels), 4):
-                if i+3 >= len(pixels): break
-                r = pixels[i]
-                g = pixels[i+1]
-                b = pixels[i+2]
-                a = pixels[i+3]
-                if idx + 4 <= len(raw_data):
-                   raw_data[idx] = b
-                   raw_data[idx+1] = g
-                   raw_data[idx+2] = r
-                   raw_data[idx+3] = a
-                   idx += 4
-    
-    print(f"[CLIP] Converted {idx} bytes to raw_data (expected {buf_size})")
+        # Already bytes (UBYTE GPU readback): no-op when uint8/contiguous
+        u8 = np.ascontiguousarray(arr, dtype=np.uint8)
+
+    # RGBA -> BGRA channel permutation; kept as an ndarray so it can be
+    # copied straight into the locked HGLOBAL without a bytes() detour.
+    bgra = swap_rb(u8).reshape(-1)
+    print(f"[CLIP] Converted {bgra.size} bytes (expected {buf_size})")
         
     # 2. Create Header
-    class BITMAPINFOHEADER(ctypes.Structure):
-        _fields_ = [
-            ('biSize', wintypes.DWORD), ('biWidth', wintypes.LONG), ('biHeight', wintypes.LONG),
-            ('biPlanes', wintypes.WORD), ('biBitCount', wintypes.WORD), ('biCompression', wintypes.DWORD),
-            ('biSizeImage', wintypes.DWORD), ('biXPelsPerMeter', wintypes.LONG),
-            ('biYPelsPerMeter', wintypes.LONG), ('biClrUsed', wintypes.DWORD), ('biClrImportant', wintypes.DWORD),
-        ]
-    
     bmi = BITMAPINFOHEADER()
-    bmi.biSize = ctypes.sizeof(BITMAPINFOHEADER)
+    bmi.biSize = _BIH_SIZE
     bmi.biWidth = width
     bmi.biHeight = height # Positive = Bottom-Up
     bmi.biPlanes = 1
     bmi.biBitCount = 32
-    bmi.biCompression = 0 
+    bmi.biCompression = 0
     bmi.biSizeImage = buf_size
-    
+
     # 3. Global Alloc
-    header_size = ctypes.sizeof(BITMAPINFOHEADER)
+    header_size = _BIH_SIZE
     total_size = header_size + buf_size
     print(f"[CLIP] Allocating {total_size} bytes ({total_size / (1024*1024):.2f} MB)")
     
-    hGlobal = kernel32.GlobalAlloc(0x0042, total_size) # GHND
+    # GMEM_MOVEABLE only (SetClipboardData requires moveable). GMEM_ZEROINIT
+    # would memset the whole ~33 MB block that we fully overwrite anyway.
+    # Reuses the handle from a previously failed copy when one is cached.
+    hGlobal = _alloc_clip_hglobal(total_size)
     if not hGlobal:
         print(f"[CLIP] ERROR: GlobalAlloc failed! GetLastError: {kernel32.GetLastError()}")
         return False
     print(f"[CLIP] GlobalAlloc succeeded, handle: {hGlobal}")
-    
+
     ptr = kernel32.GlobalLock(hGlobal)
-    if not ptr: 
+    if not ptr:
         err = kernel32.GetLastError()
         print(f"[CLIP] ERROR: GlobalLock failed! GetLastError: {err}")
-        kernel32.GlobalFree(hGlobal)
         return False
         
     try:
         ctypes.memmove(ptr, ctypes.byref(bmi), header_size)
-        ctypes.memmove(ptr + header_size, (ctypes.c_char * len(raw_data)).from_buffer(raw_data), len(raw_data))
-        print(f"[CLIP] Copied header ({header_size} bytes) + data ({len(raw_data)} bytes) to global memory")
+        # View the HGLOBAL pixel region as an ndarray and write into it
+        # directly — np.copyto dispatches to memcpy, skipping the second
+        # full-size staging copy we used to do.
+        dst = np.frombuffer((ctypes.c_ubyte * buf_size).from_address(ptr + header_size),
+                            dtype=np.uint8)
+        np.copyto(dst, bgra)
+        print(f"[CLIP] Copied header ({header_size} bytes) + data ({buf_size} bytes) to global memory")
     finally:
         kernel32.GlobalUnlock(hGlobal)
         
@@ -428,15 +646,18 @@ def copy_pixels_to_clipboard(pixels, width, height):
              time.sleep(0.1)
              if user32.OpenClipboard(0): break
         else:
+             # Keep the cached handle for reuse on the next attempt
              print("[CLIP] ERROR: OpenClipboard failed after retries")
-             kernel32.GlobalFree(hGlobal)
              return False
-            
+
     try:
         user32.EmptyClipboard()
         result = user32.SetClipboardData(CF_DIB, hGlobal)
         print(f"[CLIP] SetClipboardData returned: {result}")
-        if not result:
+        if result:
+            # Windows owns the handle now; stop tracking it
+            _surrender_clip_hglobal()
+        else:
             print(f"[CLIP] ERROR: SetClipboardData failed! GetLastError: {kernel32.GetLastError()}")
     finally:
         user32.CloseClipboard()
@@ -449,6 +670,7 @@ def copy_image_to_clipboard(image):
     Copy a Blender image to the Windows Clipboard.
     """
     width, height = image.size
-    pixels = list(image.pixels) 
+    pixels = np.empty(width * height * 4, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
     return copy_pixels_to_clipboard(pixels, width, height)
 
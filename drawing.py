@@ -10,23 +10,112 @@ from mathutils import Vector, Matrix
 import blf
 import math
 import os
+import numpy as np
 
 # Global runtime state for interaction (selection index is now local to this runtime, or could be property?)
 # Let's keep selection runtime for now, or move to properties?
 # Moving selection to properties allows "Selected State" to be saved, which is nice.
 # But "Current Stroke" is transient during modal.
 
-RUNTIME_CACHE = {
-    'current_stroke': None, # Current active action (being drawn)
-    'selected_index': -1, # Index of currently selected item
-}
+class _RuntimeCache:
+    """Per-session interaction state. __slots__ keeps the per-event
+    accesses (several per MOUSEMOVE) at C-level attribute speed instead
+    of dict hash+probe."""
+    __slots__ = (
+        'current_stroke',     # Current active action (being drawn)
+        'selected_index',     # Index of currently selected item
+        'vt_params',          # (sx, sy, tx, ty) view2d affine, refreshed by draw_callback
+        'backdrop',           # GPUOffScreen holding the committed strokes, region-sized
+        'backdrop_key',       # (view params, versions, selection) the backdrop was built for
+        'backdrop_dirty',     # forced rebuild for edits no version counter sees
+        'erase_queue',        # (x, y, radius) eraser dabs awaiting flush_erase_queue
+        'last_redraw_time',   # perf_counter stamp for the 60 Hz redraw throttle
+        'image_editor_space', # cached SpaceImageEditor for capture/paste
+        'selected_text',      # sidebar mirror of the selected TEXT item's content
+        'selected_size',      # sidebar mirror of the selected item's size
+    )
+
+    def __init__(self):
+        self.current_stroke = None
+        self.selected_index = -1
+        self.vt_params = None
+        self.backdrop = None
+        self.backdrop_key = None
+        self.backdrop_dirty = True
+        self.erase_queue = []
+        self.last_redraw_time = 0.0
+        self.image_editor_space = None
+        self.selected_text = ""
+        self.selected_size = 5
+
+
+RUNTIME_CACHE = _RuntimeCache()
+
+def mark_backdrop_dirty():
+    """Force the committed-strokes backdrop to re-render next frame. For
+    mutations the strokes/layers version counters don't cover (in-place
+    point moves, text edits through the sidebar setters)."""
+    RUNTIME_CACHE.backdrop_dirty = True
+    _GROUP_BATCH_CACHE['key'] = None
+
+def select_item(data, idx):
+    """Set the active selection and refresh the cached sidebar values.
+    The selected_text/selected_item_size UI getters poll on every panel
+    redraw, so they read these mirrors instead of walking RNA each time."""
+    RUNTIME_CACHE.selected_index = idx
+    text = ""
+    size = 5
+    if 0 <= idx < len(data.strokes):
+        item = data.strokes[idx]
+        size = item.size
+        if item.type == 'TEXT':
+            text = item.text
+    RUNTIME_CACHE.selected_text = text
+    RUNTIME_CACHE.selected_size = size
+
+def to_view_fast(p):
+    """Image -> region transform using the affine params cached by the
+    last draw_callback. Only valid while drawing in the same region."""
+    sx, sy, tx, ty = RUNTIME_CACHE.vt_params
+    return (sx * p[0] + tx, sy * p[1] + ty)
 
 # Draw handler reference
 _draw_handler = None
 
+# Verbose bake/readback tracing; prints inside the bake loops are costly
+# (one f-string + IO per stroke) so they are compiled out unless flipped on.
+_DEBUG = False
+
 _emoji_font_id = 99  # ID for emoji font
 _pixelate_shader = None
 
+# GPUTexture cache: gpu.texture.from_image() re-uploads the whole image, and
+# draw_callback hits it once per pixelate object per redraw. Keyed by
+# name_full; entries are revalidated against as_pointer()/size and dropped by
+# the depsgraph handler when the Image datablock itself changes.
+_TEX_CACHE = {}
+
+def get_cached_texture(image):
+    key = image.name_full
+    ptr = image.as_pointer()
+    dims = (image.size[0], image.size[1])
+    entry = _TEX_CACHE.get(key)
+    if entry and entry[1] == ptr and entry[2] == dims:
+        return entry[0]
+    texture = gpu.texture.from_image(image)
+    _TEX_CACHE[key] = (texture, ptr, dims)
+    return texture
+
+def _on_depsgraph_update(scene, depsgraph):
+    if not _TEX_CACHE and not _PIXELATE_FX_CACHE: return
+    for update in depsgraph.updates:
+        uid = update.id
+        if isinstance(uid, bpy.types.Image):
+            _TEX_CACHE.pop(uid.name_full, None)
+            ptr = uid.as_pointer()
+            for key in [k for k in _PIXELATE_FX_CACHE if k[0] == ptr]:
+                del _PIXELATE_FX_CACHE[key]
+
 def get_pixelate_shader():
     global _pixelate_shader
     if _pixelate_shader: return _pixelate_shader
@@ -66,16 +155,22 @@ def get_pixelate_shader():
     return _pixelate_shader
 
 # Load Windows Emoji Font
+_emoji_font_loaded = None  # Sentinel: repeated calls must not re-stat/re-load
+
 def load_emoji_font():
+    global _emoji_font_loaded
+    if _emoji_font_loaded is not None:
+        return _emoji_font_loaded
+    _emoji_font_loaded = False
     font_path = "C:/Windows/Fonts/seguiemj.ttf"
     if os.path.exists(font_path):
         try:
             blf.load(_emoji_font_id, font_path)
-            return True
+            _emoji_font_loaded = True
         except:
             # Silently fail if font cannot be loaded
             pass
-    return False
+    return _emoji_font_loaded
 
 # Initialize font on load
 try:
@@ -83,53 +178,217 @@ try:
 except:
     pass
 
+_uniform_color_shader = None
+_image_color_shader = None
+_image_shader = None
+
 def get_shader():
-    return gpu.shader.from_builtin('UNIFORM_COLOR')
+    # Memoized: draw_callback asks for this shader for nearly every item, and
+    # from_builtin() is a lookup + refcount dance we don't need to repeat.
+    global _uniform_color_shader
+    if _uniform_color_shader is None:
+        _uniform_color_shader = gpu.shader.from_builtin('UNIFORM_COLOR')
+    return _uniform_color_shader
+
+_line_shader = None
+_line_shader_failed = False
+
+def get_line_shader():
+    """UNIFORM_COLOR equivalent that applies the image->view affine in the
+    vertex stage, so cached image-space batches redraw under a new view
+    with just two uniform uploads. None when compilation failed (the
+    caller falls back to the builtin shader + gpu.matrix)."""
+    global _line_shader, _line_shader_failed
+    if _line_shader or _line_shader_failed: return _line_shader
+
+    vertex_shader = '''
+        uniform mat4 ModelViewProjectionMatrix;
+        uniform vec2 u_scale;
+        uniform vec2 u_offset;
+        in vec2 pos;
+        void main() {
+            vec2 v = pos * u_scale + u_offset;
+            gl_Position = ModelViewProjectionMatrix * vec4(v, 0.0, 1.0);
+        }
+    '''
+
+    fragment_shader = '''
+        uniform vec4 color;
+        out vec4 fragColor;
+        void main() {
+            fragColor = color;
+        }
+    '''
+
+    try:
+        _line_shader = gpu.types.GPUShader(vertex_shader, fragment_shader)
+    except Exception as e:
+        print(f"Shader Compile Error: {e}")
+        _line_shader_failed = True
+    return _line_shader
+
+def get_image_color_shader():
+    global _image_color_shader
+    if _image_color_shader is None:
+        _image_color_shader = gpu.shader.from_builtin('IMAGE_COLOR')
+    return _image_color_shader
+
+def get_image_shader():
+    global _image_shader
+    if _image_shader is None:
+        _image_shader = gpu.shader.from_builtin('IMAGE')
+    return _image_shader
+
+def warmup_shaders():
+    """Compile/fetch every shader we use so the first draw doesn't stall."""
+    try:
+        get_pixelate_shader()
+        get_shader()
+        get_line_shader()
+        get_image_color_shader()
+        get_image_shader()
+    except Exception as e:
+        # No GPU context (background mode) — shaders compile lazily instead.
+        print(f"Shader warmup skipped: {e}")
+
+# Unit-circle vertex tables keyed by segment count; trig runs only on the
+# first circle at a given resolution, after that each circle is one NumPy
+# multiply-add (draw_callback draws one per ellipse/selection dot).
+_UNIT_CIRCLES = {}
+
+def _unit_circle(segments):
+    table = _UNIT_CIRCLES.get(segments)
+    if table is None:
+        angles = np.linspace(0.0, 2.0 * math.pi, segments + 1, dtype=np.float32)
+        table = np.stack((np.cos(angles), np.sin(angles)), axis=1)
+        _UNIT_CIRCLES[segments] = table
+    return table
+
+def _circle_segments(cx, cy, radius, segments=32):
+    """Circle outline as LINES segment pairs, ready to merge into a
+    shared batch (one draw call for any number of circles)."""
+    ring = _unit_circle(segments) * radius
+    ring += (cx, cy)
+    seg = np.empty((2 * (len(ring) - 1), 2), dtype=np.float32)
+    seg[0::2] = ring[:-1]
+    seg[1::2] = ring[1:]
+    return seg
 
 def draw_circle(center, radius, color, segments=32, fill=False):
     """Draw a circle using GPU batch."""
-    points = []
-    for i in range(segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = center[0] + math.cos(angle) * radius
-        y = center[1] + math.sin(angle) * radius
-        points.append((x, y))
-    
+    cx, cy = center[0], center[1]
+    points = _unit_circle(segments) * radius + (cx, cy)
+
     shader = get_shader()
     shader.bind()
     shader.uniform_float("color", color)
-    
+
     mode = 'TRI_FAN' if fill else 'LINE_STRIP'
     if fill:
-        points.insert(0, center)
-        
+        points = np.concatenate(([(cx, cy)], points))
+
     batch = batch_for_shader(shader, mode, {"pos": points})
     batch.draw(shader)
 
 
-def draw_pixelate_rect(start, end, image, pixel_size):
+# Pixelated regions rendered once into a small offscreen and blitted on
+# later frames, keyed by (image, pixel_size, rect). The fragment shader
+# only reruns when the rect, tile size or source image changes.
+_PIXELATE_FX_CACHE = {}
+
+def _draw_pixelate_direct(start, end, image, pixel_size):
     shader = get_pixelate_shader()
     if not shader or not image: return
-    
-    # Blender 4.x: Convert image to GPU texture
-    texture = gpu.texture.from_image(image)
-    
+
+    # Blender 4.x: Convert image to GPU texture (cached across redraws)
+    texture = get_cached_texture(image)
+
     shader.bind()
     shader.uniform_sampler("image", texture)
     shader.uniform_float("pixelSize", float(pixel_size))
     shader.uniform_float("bgSize", (float(image.size[0]), float(image.size[1])))
-    
+
     # Points
     x1, y1 = start
     x2, y2 = end
     points = [(x1, y1), (x2, y1), (x2, y2), (x1, y2)]
-    
+
     # UVs
     w, h = image.size
     uvs = [(x1/w, y1/h), (x2/w, y1/h), (x2/w, y2/h), (x1/w, y2/h)]
-    
+
     batch = batch_for_shader(shader, 'TRI_FAN', {"pos": points, "texCoord": uvs})
     batch.draw(shader)
+
+def _pixelate_offscreen(image, pixel_size, x1, y1, x2, y2, w, h):
+    key = (image.as_pointer(), int(pixel_size),
+           round(x1), round(y1), round(x2), round(y2))
+    offscreen = _PIXELATE_FX_CACHE.get(key)
+    if offscreen is not None:
+        return offscreen
+
+    shader = get_pixelate_shader()
+    if not shader: return None
+    try:
+        offscreen = gpu.types.GPUOffScreen(w, h)
+    except Exception:
+        return None
+
+    texture = get_cached_texture(image)
+    iw, ih = image.size
+    with offscreen.bind():
+        with gpu.matrix.push_pop():
+            gpu.matrix.load_identity()
+            ortho_matrix = Matrix.Identity(4)
+            ortho_matrix[0][0] = 2.0 / w
+            ortho_matrix[1][1] = 2.0 / h
+            ortho_matrix[0][3] = -1.0
+            ortho_matrix[1][3] = -1.0
+            gpu.matrix.load_projection_matrix(ortho_matrix)
+
+            shader.bind()
+            shader.uniform_sampler("image", texture)
+            shader.uniform_float("pixelSize", float(pixel_size))
+            shader.uniform_float("bgSize", (float(iw), float(ih)))
+            points = [(0, 0), (w, 0), (w, h), (0, h)]
+            uvs = [(x1/iw, y1/ih), (x2/iw, y1/ih), (x2/iw, y2/ih), (x1/iw, y2/ih)]
+            batch = batch_for_shader(shader, 'TRI_FAN', {"pos": points, "texCoord": uvs})
+            batch.draw(shader)
+
+    # Bounded cache; release the GPU memory instead of just dropping
+    # the references
+    if len(_PIXELATE_FX_CACHE) > 64:
+        for old in _PIXELATE_FX_CACHE.values():
+            try:
+                old.free()
+            except Exception:
+                pass
+        _PIXELATE_FX_CACHE.clear()
+    _PIXELATE_FX_CACHE[key] = offscreen
+    return offscreen
+
+def draw_pixelate_rect(start, end, image, pixel_size):
+    if not image: return
+    x1, y1 = start
+    x2, y2 = end
+    w = int(abs(x2 - x1))
+    h = int(abs(y2 - y1))
+    if w < 1 or h < 1: return
+
+    offscreen = _pixelate_offscreen(image, pixel_size, x1, y1, x2, y2, w, h)
+    if offscreen is None:
+        _draw_pixelate_direct(start, end, image, pixel_size)
+        return
+
+    # Blit the cached result as a plain textured quad
+    shader = get_image_color_shader()
+    shader.bind()
+    shader.uniform_sampler("image", offscreen.texture_color)
+    shader.uniform_float("color", (1, 1, 1, 1))
+    points = [(x1, y1), (x2, y1), (x2, y2), (x1, y2)]
+    tex_co = [(0, 0), (1, 0), (1, 1), (0, 1)]
+    batch = batch_for_shader(shader, 'TRI_FAN', {"pos": points, "texCoord": tex_co})
+    batch.draw(shader)
     
 def draw_rect(start, end, color, fill=False):
     """Draw a rectangle."""
@@ -150,32 +409,100 @@ def draw_rect(start, end, color, fill=False):
     batch.draw(shader)
 
 
+# Head vertices keyed by the draw coordinates; while the view is static the
+# normalize/perpendicular math runs once per arrow instead of every frame.
+_ARROW_GEOM_CACHE = {}
+
 def draw_arrow(start, end, color, size):
     """Draw an arrow."""
     shader = get_shader()
     shader.bind()
     shader.uniform_float("color", color)
-    
+
     batch = batch_for_shader(shader, 'LINES', {"pos": [start, end]})
     batch.draw(shader)
-    
-    v_vec = Vector(end) - Vector(start)
-    if v_vec.length < 0.1: return
-    v_vec.normalize()
-    p_vec = Vector((-v_vec.y, v_vec.x))
-    
+
+    key = (start[0], start[1], end[0], end[1], size)
+    head = _ARROW_GEOM_CACHE.get(key)
+    if head is None:
+        pts = _arrow_head_points(start, end, size)
+        if pts is None: return
+        if len(_ARROW_GEOM_CACHE) > 512:
+            _ARROW_GEOM_CACHE.clear()
+        head = _ARROW_GEOM_CACHE[key] = pts
+
+    batch = batch_for_shader(shader, 'TRIS', {"pos": head})
+    batch.draw(shader)
+
+
+def _arrow_head_points(start, end, size):
+    """Head triangle [tip, p1, p2] for an arrow, or None when degenerate.
+    Plain tuple math: ~6 Vector allocations saved per arrow."""
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+    length = math.hypot(dx, dy)
+    if length < 0.1: return None
+    ux, uy = dx / length, dy / length
+    px, py = -uy, ux
+
     head_size = size * 3
-    p1 = Vector(end) - v_vec * head_size + p_vec * (head_size * 0.5)
-    p2 = Vector(end) - v_vec * head_size - p_vec * (head_size * 0.5)
-    
-    batch = batch_for_shader(shader, 'TRIS', {"pos": [tuple(end), tuple(p1), tuple(p2)]})
+    half = head_size * 0.5
+    bx = end[0] - ux * head_size
+    by = end[1] - uy * head_size
+    return [(end[0], end[1]),
+            (bx + px * half, by + py * half),
+            (bx - px * half, by - py * half)]
+
+
+def update_arrow_head(item):
+    """Store the head triangle on the arrow item so drawing never has to
+    renormalize; call after start_pos/end_pos/size change."""
+    pts = _arrow_head_points(item.start_pos, item.end_pos, item.size)
+    if pts is None:
+        item.head_valid = False
+        return
+    item.head_p1 = pts[1]
+    item.head_p2 = pts[2]
+    item.head_valid = True
+
+
+def draw_arrow_cached(start, end, p1, p2, color):
+    """Draw an arrow from pretransformed shaft/head points."""
+    shader = get_shader()
+    shader.bind()
+    shader.uniform_float("color", color)
+    batch = batch_for_shader(shader, 'LINES', {"pos": [start, end]})
     batch.draw(shader)
+    batch = batch_for_shader(shader, 'TRIS', {"pos": [end, p1, p2]})
+    batch.draw(shader)
+
+
+# blf keeps per-font-id global state, so consecutive text items sharing
+# size/color can skip the C setters entirely. Reset per render pass since
+# Blender's own UI touches blf between our frames.
+_BLF_STATE = {'size': None, 'color': None}
+
+def _blf_reset_state():
+    _BLF_STATE['size'] = None
+    _BLF_STATE['color'] = None
+
+def _blf_size(fid, size):
+    key = (fid, size)
+    if _BLF_STATE['size'] != key:
+        blf.size(fid, size)
+        _BLF_STATE['size'] = key
+
+def _blf_color(fid, color):
+    key = (fid, color[0], color[1], color[2], color[3])
+    if _BLF_STATE['color'] != key:
+        blf.color(fid, color[0], color[1], color[2], color[3])
+        _BLF_STATE['color'] = key
 
 
 def draw_text(position, text, size, color, is_emoji=False, show_bg=False, bg_color=None, show_shadow=False, shadow_color=None):
     """Draw text using blf."""
     fid = _emoji_font_id if is_emoji else 0
-    blf.size(fid, size)
+    _blf_size(fid, size)
     
     # Calculate Dimensions for Background
     if show_bg and bg_color:
@@ -197,72 +524,301 @@ def draw_text(position, text, size, color, is_emoji=False, show_bg=False, bg_col
     if show_shadow and shadow_color:
         offset = size * 0.05
         blf.position(fid, position[0] + offset, position[1] - offset, 0)
-        blf.color(fid, shadow_color[0], shadow_color[1], shadow_color[2], shadow_color[3])
+        _blf_color(fid, shadow_color)
         blf.draw(fid, text)
 
     blf.position(fid, position[0], position[1], 0)
-    blf.color(fid, color[0], color[1], color[2], color[3])
+    _blf_color(fid, color)
     blf.draw(fid, text)
 
 
+# Contiguous float32 copies of each stroke's points keyed by as_pointer();
+# iterating a CollectionProperty per frame is too slow for drawing. Cleared
+# wholesale when strokes_version moves (element pointers are not stable
+# across removals).
+_STROKE_POS_CACHE = {'version': -1, 'arrays': {}}
+
+# Image-space GPUBatches for the merged LINES buckets plus the indices of
+# items that need per-type dispatch, rebuilt when the data versions move
+# (or via mark_backdrop_dirty for in-place edits). Pan/zoom reuses the
+# uploaded buffers under a fresh gpu.matrix affine.
+_GROUP_BATCH_CACHE = {'key': None, 'batches': [], 'others': []}
+
+# Layer visibility as a bool array indexed by layer id, rebuilt only when
+# data.layers_version moves; paired with a strokes_version-keyed layer_id
+# array so per-stroke visibility is one vectorized gather, not a dict
+# lookup + branch per item.
+_LAYER_VIS_CACHE = {'ver': -1, 'vis': None}
+_STROKE_LAYER_IDS = {'version': -1, 'arr': None}
+
+def _visible_stroke_mask(data):
+    """Boolean mask over data.strokes from the per-layer visibility flags.
+    Strokes pointing at a missing layer count as visible (legacy files)."""
+    if _LAYER_VIS_CACHE['ver'] != data.layers_version:
+        _LAYER_VIS_CACHE['vis'] = np.fromiter(
+            (lyr.is_visible for lyr in data.layers), dtype=bool,
+            count=len(data.layers))
+        _LAYER_VIS_CACHE['ver'] = data.layers_version
+    vis = _LAYER_VIS_CACHE['vis']
+
+    strokes = data.strokes
+    if _STROKE_LAYER_IDS['version'] != data.strokes_version:
+        ids = np.empty(len(strokes), dtype=np.int32)
+        strokes.foreach_get('layer_id', ids)
+        _STROKE_LAYER_IDS['arr'] = ids
+        _STROKE_LAYER_IDS['version'] = data.strokes_version
+    ids = _STROKE_LAYER_IDS['arr']
+
+    mask = np.ones(len(strokes), dtype=bool)
+    in_range = (ids >= 0) & (ids < len(vis))
+    mask[in_range] = vis[ids[in_range]]
+    return mask
+
+
+def get_points_np(item):
+    """The stroke's points as a read-only (N, 2) float32 view over its
+    packed blob. Zero parsing; the bytes are the array."""
+    return np.frombuffer(item.points_blob, dtype=np.float32).reshape(-1, 2)
+
+
+def _get_stroke_positions(data, item):
+    # Still cached: the StringProperty getter copies the bytes out of RNA
+    # on every access, so hot loops shouldn't re-fetch per frame.
+    if _STROKE_POS_CACHE['version'] != data.strokes_version:
+        _STROKE_POS_CACHE['arrays'].clear()
+        _STROKE_POS_CACHE['version'] = data.strokes_version
+    key = item.as_pointer()
+    arr = _STROKE_POS_CACHE['arrays'].get(key)
+    if arr is None:
+        arr = _STROKE_POS_CACHE['arrays'][key] = get_points_np(item)
+    return arr
+
+
+def invalidate_stroke_cache(item):
+    """Drop the cached point array after mutating points in place."""
+    _STROKE_POS_CACHE['arrays'].pop(item.as_pointer(), None)
+    RUNTIME_CACHE.backdrop_dirty = True
+
+
+def set_points_np(item, arr):
+    """Replace a stroke's points from an (N, 2) array-like in one blob
+    assignment. Also refreshes the cached bounds."""
+    arr = np.asarray(arr, dtype=np.float32).reshape(-1, 2)
+    item.points_blob = arr.tobytes()
+    if len(arr):
+        item.bbox_min = tuple(arr.min(axis=0))
+        item.bbox_max = tuple(arr.max(axis=0))
+        item.bbox_valid = True
+    else:
+        item.bbox_valid = False
+    invalidate_stroke_cache(item)
+
+
+def update_stroke_bbox(item):
+    """Recompute the cached point bounds after the points changed."""
+    arr = get_points_np(item)
+    if len(arr) == 0:
+        item.bbox_valid = False
+        return
+    item.bbox_min = tuple(arr.min(axis=0))
+    item.bbox_max = tuple(arr.max(axis=0))
+    item.bbox_valid = True
+
+
+# Per-type draw functions shared by draw_callback, bake_stroke_to_offscreen
+# and get_composed_image_pixels: one dict lookup per item instead of an
+# if/elif cascade, and a single place to fix type-specific draw bugs.
+# Signature is (item, xf, image) where xf maps the item's coordinate space
+# to the target space and image feeds the pixelate shader.
+
+def _xf_identity(p):
+    return p
+
+def _draw_item_arrow(item, xf, image):
+    if item.head_valid:
+        # Head triangle precomputed at commit time; just transform it
+        draw_arrow_cached(xf(item.start_pos), xf(item.end_pos),
+                          xf(item.head_p1), xf(item.head_p2), item.color)
+    else:
+        # Legacy items saved before the cached head existed
+        draw_arrow(xf(item.start_pos), xf(item.end_pos), item.color, item.size)
+
+def _draw_item_rect(item, xf, image):
+    draw_rect(xf(item.start_pos), xf(item.end_pos), item.color, item.is_filled)
+
+def _draw_item_ellipse(item, xf, image):
+    s0, s1 = xf(item.start_pos)
+    e0, e1 = xf(item.end_pos)
+    dx = s0 - e0
+    dy = s1 - e1
+    # Scalar math: no Vector allocations per ellipse per frame
+    draw_circle((0.5 * (s0 + e0), 0.5 * (s1 + e1)),
+                0.5 * math.sqrt(dx * dx + dy * dy), item.color,
+                fill=item.is_filled)
+
+def _draw_item_text(item, xf, image):
+    draw_text(xf(item.start_pos), item.text, item.size, item.color,
+              is_emoji=item.is_emoji,
+              show_bg=item.text_show_bg, bg_color=item.text_bg_color,
+              show_shadow=item.text_show_shadow, shadow_color=item.text_shadow_color)
+
+def _draw_item_crop(item, xf, image):
+    draw_rect(xf(item.start_pos), xf(item.end_pos), (1, 1, 1, 0.5), False)
+
+def _draw_item_pixelate(item, xf, image):
+    draw_pixelate_rect(xf(item.start_pos), xf(item.end_pos), image, item.pixelate_size)
+
+_DRAW_DISPATCH = {
+    'ARROW': _draw_item_arrow,
+    'RECTANGLE': _draw_item_rect,
+    'ELLIPSE': _draw_item_ellipse,
+    'TEXT': _draw_item_text,
+    'CROP': _draw_item_crop,
+    'PIXELATE': _draw_item_pixelate,
+}
+
+
+def _outline_segments(item, xf):
+    """Segment-pair array for RECTANGLE/ELLIPSE outlines, or None for items
+    that can't join the shared LINES batch (filled shapes, text, ...)."""
+    itype = item.type
+    if itype == 'RECTANGLE' and not item.is_filled:
+        x1, y1 = xf(item.start_pos)
+        x2, y2 = xf(item.end_pos)
+        return np.array([(x1, y1), (x2, y1), (x2, y1), (x2, y2),
+                         (x2, y2), (x1, y2), (x1, y2), (x1, y1)], dtype=np.float32)
+    if itype == 'ELLIPSE' and not item.is_filled:
+        s0, s1 = xf(item.start_pos)
+        e0, e1 = xf(item.end_pos)
+        dx = s0 - e0
+        dy = s1 - e1
+        return _circle_segments(0.5 * (s0 + e0), 0.5 * (s1 + e1),
+                                0.5 * math.sqrt(dx * dx + dy * dy))
+    return None
+
+
+def _flush_line_groups(groups):
+    """Draw accumulated segment pairs: one LINES call per (color, width)
+    bucket, buckets ordered by width to avoid line_width_set thrash."""
+    if not groups: return
+    shader = get_shader()
+    shader.bind()
+    for (group_color, group_width) in sorted(groups, key=lambda k: k[1]):
+        gpu.state.line_width_set(group_width)
+        shader.uniform_float("color", group_color)
+        segs = groups[(group_color, group_width)]
+        pos = segs[0] if len(segs) == 1 else np.concatenate(segs)
+        batch = batch_for_shader(shader, 'LINES', {"pos": pos})
+        batch.draw(shader)
+
+
+# Coarse uniform grid over image space mapping cell -> stroke indices, so
+# hit_test/erase_at only inspect strokes near the cursor instead of scanning
+# the whole collection per mouse event. Rebuilt lazily whenever
+# data.strokes_version moves past the version it was built against.
+_GRID_CELL = 128
+_SPATIAL_GRID = {'version': -1, 'cells': {}}
+
+
+def _stroke_bounds(item):
+    """Image-space (min_x, min_y, max_x, max_y) for any item, or None."""
+    itype = item.type
+    if itype == 'STROKE':
+        if not item.points_blob: return None
+        if not item.bbox_valid:
+            update_stroke_bbox(item)
+        return (item.bbox_min[0], item.bbox_min[1], item.bbox_max[0], item.bbox_max[1])
+    if itype == 'TEXT':
+        x, y = item.start_pos
+        size = item.size
+        return (x, y, x + len(item.text) * size * 0.6, y + size)
+    x1, y1 = item.start_pos
+    x2, y2 = item.end_pos
+    return (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+
+
+def _rebuild_spatial_grid(data):
+    cells = {}
+    for i, item in enumerate(data.strokes):
+        bounds = _stroke_bounds(item)
+        if bounds is None: continue
+        for cx in range(int(bounds[0] // _GRID_CELL), int(bounds[2] // _GRID_CELL) + 1):
+            for cy in range(int(bounds[1] // _GRID_CELL), int(bounds[3] // _GRID_CELL) + 1):
+                cells.setdefault((cx, cy), []).append(i)
+    _SPATIAL_GRID['cells'] = cells
+    _SPATIAL_GRID['version'] = data.strokes_version
+
+
+def _spatial_grid_insert(data, index, item, prev_version):
+    """Incrementally index a newly appended stroke when the grid was current,
+    so committing a stroke doesn't force a full rebuild on the next query."""
+    if _SPATIAL_GRID['version'] != prev_version:
+        return  # stale anyway; the next query rebuilds
+    bounds = _stroke_bounds(item)
+    if bounds is not None:
+        cells = _SPATIAL_GRID['cells']
+        for cx in range(int(bounds[0] // _GRID_CELL), int(bounds[2] // _GRID_CELL) + 1):
+            for cy in range(int(bounds[1] // _GRID_CELL), int(bounds[3] // _GRID_CELL) + 1):
+                cells.setdefault((cx, cy), []).append(index)
+    _SPATIAL_GRID['version'] = data.strokes_version
+
+
+def _query_spatial_grid(data, min_x, min_y, max_x, max_y):
+    """Indices of strokes whose bounds may overlap the query rect."""
+    if _SPATIAL_GRID['version'] != data.strokes_version:
+        _rebuild_spatial_grid(data)
+    cells = _SPATIAL_GRID['cells']
+    found = set()
+    for cx in range(int(min_x // _GRID_CELL), int(max_x // _GRID_CELL) + 1):
+        for cy in range(int(min_y // _GRID_CELL), int(max_y // _GRID_CELL) + 1):
+            found.update(cells.get((cx, cy), ()))
+    return found
+
+
+# Flat (N, 4) array of hit rects (min_x, min_y, max_x, max_y) with the
+# per-type hit margin already baked in, rebuilt when strokes_version moves.
+# Lets hit_test run as four vectorized comparisons instead of a Python
+# branch ladder with Vector allocations per stroke.
+_HIT_BBOX_PAD = {'STROKE': 10.0, 'TEXT': 0.0, 'CROP': None}
+_BBOX_CACHE = {'version': -1, 'arr': None}
+
+def _get_hit_bboxes(data):
+    if _BBOX_CACHE['version'] != data.strokes_version:
+        strokes = data.strokes
+        arr = np.full((len(strokes), 4), np.nan, dtype=np.float32)
+        for i, item in enumerate(strokes):
+            pad = _HIT_BBOX_PAD.get(item.type, 5.0)
+            if pad is None:  # CROP is not selectable by click
+                continue
+            bounds = _stroke_bounds(item)
+            if bounds is None: continue
+            arr[i] = (bounds[0] - pad, bounds[1] - pad,
+                      bounds[2] + pad, bounds[3] + pad)
+        _BBOX_CACHE['arr'] = arr
+        _BBOX_CACHE['version'] = data.strokes_version
+    return _BBOX_CACHE['arr']
+
+
 def hit_test(context, mouse_pos):
     """Check if mouse hits an item. Returns index or -1."""
     # Convert mouse to image space
     image_pos = view_to_image(context, mouse_pos)
-    idx_hit = -1
-    
+
     # Access strokes from Scene Data
     if not hasattr(context.scene, 'better_image_data'): return -1
-    strokes = context.scene.better_image_data.strokes
-    
-    # Iterate backwards (top items first)
-    for i in range(len(strokes) - 1, -1, -1):
-        item = strokes[i]
-        itype = item.type
-        
-        hit = False
-        if itype == 'TEXT':
-            x, y = item.start_pos
-            size = item.size
-            w = len(item.text) * size * 0.6
-            h = size
-            if x <= image_pos[0] <= x + w and y <= image_pos[1] <= y + h:
-                hit = True
-                
-            if x <= image_pos[0] <= x + w and y <= image_pos[1] <= y + h:
-                hit = True
-                
-        elif itype in {'RECTANGLE', 'ELLIPSE', 'ARROW', 'PIXELATE'}:
-             p1 = Vector(item.start_pos)
-             p2 = Vector(item.end_pos)
-             min_x = min(p1.x, p2.x) - 5
-             max_x = max(p1.x, p2.x) + 5
-             min_y = min(p1.y, p2.y) - 5
-             max_y = max(p1.y, p2.y) + 5
-             if min_x <= image_pos[0] <= max_x and min_y <= image_pos[1] <= max_y:
-                 hit = True
-                 
-        elif itype == 'STROKE':
-            if len(item.points) == 0: continue
-            # Check bounding box first
-            # Optimization: could cache bounds
-            xs = [p.pos[0] for p in item.points]
-            ys = [p.pos[1] for p in item.points]
-            if not xs: continue
-            
-            min_x = min(xs) - 10
-            max_x = max(xs) + 10
-            min_y = min(ys) - 10
-            max_y = max(ys) + 10
-            
-            if min_x <= image_pos[0] <= max_x and min_y <= image_pos[1] <= max_y:
-                hit = True
-                
-        if hit:
-            idx_hit = i
-            break
-            
-    return idx_hit
+    data = context.scene.better_image_data
+
+    bboxes = _get_hit_bboxes(data)
+    if bboxes is None or len(bboxes) == 0: return -1
+
+    # One AABB pass over every stroke; NaN rows (empty/CROP) fail every
+    # comparison. Topmost hit = highest index.
+    x, y = image_pos[0], image_pos[1]
+    mask = ((bboxes[:, 0] <= x) & (x <= bboxes[:, 2]) &
+            (bboxes[:, 1] <= y) & (y <= bboxes[:, 3]))
+    hits = np.flatnonzero(mask)
+    if hits.size == 0: return -1
+    return int(hits[-1])
 
 
 def draw_callback():
@@ -274,96 +830,247 @@ def draw_callback():
     # Use global data
     if not hasattr(context.scene, 'better_image_data'): return
     strokes = context.scene.better_image_data.strokes
-    
+
+    # Empty canvas and nothing being drawn: the common case while just
+    # viewing an image — skip all GPU state changes
+    if len(strokes) == 0 and RUNTIME_CACHE.current_stroke is None:
+        return
+
+    _blf_reset_state()
     gpu.state.blend_set('ALPHA')
-    def to_view(p): return image_to_view(context, p)
-    
+
+    # The view2d transform is affine, so probe it once and map points with
+    # plain multiply-adds instead of a view_to_region C-dispatch per point.
+    try:
+        ox, oy = context.region.view2d.view_to_region(0, 0, clip=False)
+        ux, uy = context.region.view2d.view_to_region(1, 1, clip=False)
+    except:
+        return
+    sx, sy, tx, ty = ux - ox, uy - oy, ox, oy
+    RUNTIME_CACHE.vt_params = (sx, sy, tx, ty)
+    to_view = to_view_fast
+    view_scale = np.array((sx, sy), dtype=np.float32)
+    view_offset = np.array((tx, ty), dtype=np.float32)
+
+    # Region rect in image space, for culling strokes that pan/zoom moved
+    # entirely off-screen. Derived from the inverse affine (two more RNA
+    # region_to_view round-trips saved). Padded by head/line overdraw.
+    region = context.region
+    if not sx or not sy: return
+    vx0, vy0 = (0 - tx) / sx, (0 - ty) / sy
+    vx1, vy1 = (region.width - tx) / sx, (region.height - ty) / sy
+    view_min_x, view_max_x = (vx0, vx1) if vx0 <= vx1 else (vx1, vx0)
+    view_min_y, view_max_y = (vy0, vy1) if vy0 <= vy1 else (vy1, vy0)
+    cull_scale = abs(sx) if sx else 1.0
+
     # Draw Persistent Strokes
-    # Cache layer visibility
     data = context.scene.better_image_data
-    layer_vis = {}
-    for i, lyr in enumerate(data.layers):
-        layer_vis[i] = lyr.is_visible
-        
-    for idx, item in enumerate(strokes):
-        # Check Visibility
-        lid = item.layer_id
-        if lid in layer_vis and not layer_vis[lid]:
-            continue
 
-        itype = item.type
-        color = item.color
-        size = item.size
-        is_emoji = item.is_emoji
-        
-        is_selected = (idx == RUNTIME_CACHE['selected_index'])
-        
-        gpu.state.line_width_set(size if itype == 'STROKE' else float(size/2))
-        
-        draw_color = color
-        
-        if itype == 'STROKE':
-            points = [to_view(p.pos) for p in item.points]
-            if len(points) < 2: continue
-            shader = get_shader()
-            shader.bind()
-            shader.uniform_float("color", draw_color)
-            batch = batch_for_shader(shader, 'LINE_STRIP', {"pos": points})
-            batch.draw(shader)
-            
-        elif itype == 'ARROW':
-            start = to_view(item.start_pos)
-            end = to_view(item.end_pos)
-            draw_arrow(start, end, draw_color, size)
-            
-        elif itype == 'RECTANGLE':
-            start = to_view(item.start_pos)
-            end = to_view(item.end_pos)
-            draw_rect(start, end, draw_color, item.is_filled)
-            
-        elif itype == 'ELLIPSE':
-            start = Vector(to_view(item.start_pos))
-            end = Vector(to_view(item.end_pos))
-            center = (start + end) / 2
-            radius = (start - end).length / 2
-            draw_circle(center, radius, draw_color, fill=item.is_filled)
-            
-        elif itype == 'TEXT':
-            pos = to_view(item.start_pos)
-            # Retrieve optional properties safely
-            show_bg = getattr(item, 'text_show_bg', False)
-            bg_col = getattr(item, 'text_bg_color', (0,0,0,0.5))
-            show_shadow = getattr(item, 'text_show_shadow', False)
-            shad_col = getattr(item, 'text_shadow_color', (0,0,0,1))
-            draw_text(pos, item.text, item.size, draw_color, is_emoji=is_emoji,
-                      show_bg=show_bg, bg_color=bg_col, show_shadow=show_shadow, shadow_color=shad_col)
-            
+    def render_committed():
+        # Merged line geometry (strokes + shape outlines) is cached as
+        # image-space GPUBatches keyed by the data versions, so pan/zoom
+        # redraws reuse the uploaded buffers under a new gpu.matrix affine
+        # instead of re-concatenating and re-uploading everything.
+        cache = _GROUP_BATCH_CACHE
+        cache_key = (data.strokes_version, data.layers_version)
+        if cache['key'] != cache_key:
+            stroke_groups = {}
+            others = []
 
-            
-        elif itype == 'CROP':
-            start = to_view(item.start_pos)
-            end = to_view(item.end_pos)
-            draw_rect(start, end, (1, 1, 1, 0.5), False)
-            
-        elif itype == 'PIXELATE':
-            start = to_view(item.start_pos)
-            end = to_view(item.end_pos)
-            # Need IMAGE for pixelate logic
-            # Image is available as context.space_data.image
-            draw_pixelate_rect(start, end, context.space_data.image, item.pixelate_size)
-            
-        # Selection Indicator
-        if is_selected:
-             gpu.state.line_width_set(2.0)
-             if itype == 'STROKE' and len(item.points) > 0:
-                 pt = to_view(item.points[0].pos)
-                 draw_circle(pt, 5, (0, 1, 1, 1))
-             elif itype in {'TEXT', 'RECTANGLE', 'ELLIPSE', 'ARROW', 'CROP', 'PIXELATE'}:
-                 pt = to_view(item.start_pos)
-                 draw_circle(pt, 5, (0, 1, 1, 1))
+            # Vectorized visibility pre-filter: hidden strokes never enter
+            # the Python loop at all
+            visible = _visible_stroke_mask(data)
+
+            for idx in np.flatnonzero(visible):
+                item = strokes[idx]
+                itype = item.type
+
+                if itype == 'STROKE':
+                    arr = _get_stroke_positions(data, item)
+                    n = len(arr)
+                    if n < 2: continue
+                    # Segment pairs in image coordinates
+                    seg = np.empty((2 * (n - 1), 2), dtype=np.float32)
+                    seg[0::2] = arr[:-1]
+                    seg[1::2] = arr[1:]
+                    stroke_groups.setdefault(
+                        (tuple(item.color), item.size), []).append(seg)
+                else:
+                    seg = _outline_segments(item, _xf_identity)
+                    if seg is not None:
+                        stroke_groups.setdefault(
+                            (tuple(item.color), float(item.size / 2)), []).append(seg)
+                    else:
+                        others.append(idx)
+
+            shader = get_line_shader() or get_shader()
+            batches = []
+            for (group_color, group_width) in sorted(stroke_groups, key=lambda k: k[1]):
+                segs = stroke_groups[(group_color, group_width)]
+                pos = segs[0] if len(segs) == 1 else np.concatenate(segs)
+                batches.append((group_color, group_width,
+                                batch_for_shader(shader, 'LINES', {"pos": pos})))
+            cache['batches'] = batches
+            cache['others'] = others
+            cache['key'] = cache_key
+
+        # One draw per bucket, view affine applied on the GPU: two uniform
+        # uploads into the custom vertex shader (or a gpu.matrix affine if
+        # it failed to compile). Line widths stay in screen pixels.
+        if cache['batches']:
+            shader = get_line_shader()
+            if shader is not None:
+                shader.bind()
+                shader.uniform_float("u_scale", (sx, sy))
+                shader.uniform_float("u_offset", (tx, ty))
+                for group_color, group_width, batch in cache['batches']:
+                    gpu.state.line_width_set(group_width)
+                    shader.uniform_float("color", group_color)
+                    batch.draw(shader)
+            else:
+                shader = get_shader()
+                shader.bind()
+                with gpu.matrix.push_pop():
+                    gpu.matrix.translate((tx, ty))
+                    gpu.matrix.scale((sx, sy))
+                    for group_color, group_width, batch in cache['batches']:
+                        gpu.state.line_width_set(group_width)
+                        shader.uniform_float("color", group_color)
+                        batch.draw(shader)
+
+        # Items that can't join the merged batches (text, arrows, filled
+        # shapes, pixelate) draw in view space, culled per item.
+        sel_idx = RUNTIME_CACHE.selected_index
+        for idx in cache['others']:
+            if idx >= len(strokes): continue
+            item = strokes[idx]
+            size = item.size
+
+            bounds = _stroke_bounds(item)
+            if bounds is not None:
+                pad = (size * 3.0) / cull_scale
+                if (bounds[2] < view_min_x - pad or bounds[0] > view_max_x + pad or
+                        bounds[3] < view_min_y - pad or bounds[1] > view_max_y + pad):
+                    continue
+
+            gpu.state.line_width_set(float(size / 2))
+            draw_fn = _DRAW_DISPATCH.get(item.type)
+            if draw_fn:
+                draw_fn(item, to_view, context.space_data.image)
+
+        # Selection Indicator (screen-constant radius, so outside the
+        # cached image-space batches)
+        if 0 <= sel_idx < len(strokes):
+            item = strokes[sel_idx]
+            pt = None
+            if item.type == 'STROKE':
+                pts = _get_stroke_positions(data, item)
+                if len(pts): pt = to_view(pts[0])
+            elif item.type in {'TEXT', 'RECTANGLE', 'ELLIPSE', 'ARROW', 'CROP', 'PIXELATE'}:
+                pt = to_view(item.start_pos)
+            if pt is not None:
+                gpu.state.line_width_set(2.0)
+                draw_circle(pt, 5, (0, 1, 1, 1))
+
+    # Backdrop cache: the committed strokes only re-render when something
+    # about them (or the view) actually changed; otherwise each frame is a
+    # single textured-quad blit plus the live transient stroke. Keyed so
+    # pan/zoom/selection changes rebuild automatically; in-place edits the
+    # version counters can't see go through mark_backdrop_dirty().
+    backdrop_key = (region.width, region.height, sx, sy, tx, ty,
+                    data.strokes_version, data.layers_version,
+                    RUNTIME_CACHE.selected_index,
+                    context.space_data.image.name_full)
+    offs = RUNTIME_CACHE.backdrop
+    if offs is None or offs.width != region.width or offs.height != region.height:
+        if offs is not None:
+            offs.free()
+        try:
+            offs = gpu.types.GPUOffScreen(region.width, region.height)
+        except Exception as e:
+            print(f"Backdrop offscreen failed: {e}")
+            offs = None
+        RUNTIME_CACHE.backdrop = offs
+        RUNTIME_CACHE.backdrop_key = None
+
+    if offs is None:
+        # No offscreen (tiny region / GPU hiccup): draw directly as before
+        render_committed()
+    else:
+        curr = RUNTIME_CACHE.current_stroke
+        if RUNTIME_CACHE.backdrop_dirty or RUNTIME_CACHE.backdrop_key != backdrop_key:
+            with offs.bind():
+                fb = gpu.state.active_framebuffer_get()
+                fb.clear(color=(0.0, 0.0, 0.0, 0.0))
+                with gpu.matrix.push_pop():
+                    gpu.matrix.load_identity()
+                    ortho_matrix = Matrix.Identity(4)
+                    ortho_matrix[0][0] = 2.0 / region.width
+                    ortho_matrix[1][1] = 2.0 / region.height
+                    ortho_matrix[0][3] = -1.0
+                    ortho_matrix[1][3] = -1.0
+                    gpu.matrix.load_projection_matrix(ortho_matrix)
+                    gpu.state.blend_set('ALPHA')
+                    render_committed()
+            RUNTIME_CACHE.backdrop_key = backdrop_key
+            RUNTIME_CACHE.backdrop_dirty = False
+            # Rebuild wiped any transient tail baked below; redraw it all
+            if curr is not None:
+                curr['baked_idx'] = 0
+
+        # Dirty-rect transient drawing: instead of re-sending the whole
+        # in-progress stroke every frame, append only its unbaked tail
+        # into the backdrop, scissored to the tail's padded bounds. Frame
+        # cost tracks the new segment length, not the stroke length.
+        if curr is not None and curr['type'] == 'STROKE':
+            pts = curr['points']
+            baked = curr.get('baked_idx', 0)
+            if len(pts) > 1 and len(pts) > baked:
+                # Re-anchor at the last baked point so the strip connects
+                tail_start = baked - 1 if baked > 0 else 0
+                view_pts = (np.asarray(pts[tail_start:], dtype=np.float32)
+                            * view_scale + view_offset)
+                pad = float(curr['size']) + 2.0
+                rx0, ry0 = view_pts.min(axis=0) - pad
+                rx1, ry1 = view_pts.max(axis=0) + pad
+                with offs.bind():
+                    with gpu.matrix.push_pop():
+                        gpu.matrix.load_identity()
+                        ortho_matrix = Matrix.Identity(4)
+                        ortho_matrix[0][0] = 2.0 / region.width
+                        ortho_matrix[1][1] = 2.0 / region.height
+                        ortho_matrix[0][3] = -1.0
+                        ortho_matrix[1][3] = -1.0
+                        gpu.matrix.load_projection_matrix(ortho_matrix)
+                        gpu.state.scissor_test_set(True)
+                        gpu.state.scissor_set(int(rx0), int(ry0),
+                                              int(rx1 - rx0) + 1, int(ry1 - ry0) + 1)
+                        gpu.state.blend_set('ALPHA')
+                        gpu.state.line_width_set(curr['size'])
+                        shader = get_shader()
+                        shader.bind()
+                        shader.uniform_float("color", curr['color'])
+                        batch = batch_for_shader(shader, 'LINE_STRIP', {"pos": view_pts})
+                        batch.draw(shader)
+                        gpu.state.scissor_test_set(False)
+                curr['baked_idx'] = len(pts)
+
+        # The offscreen holds premultiplied coverage (straight alpha drawn
+        # onto transparent black), so blit with the matching blend mode.
+        gpu.state.blend_set('ALPHA_PREMULT')
+        img_shader = get_image_shader()
+        w, h = region.width, region.height
+        batch = batch_for_shader(img_shader, 'TRI_FAN', {
+            "pos": ((0, 0), (w, 0), (w, h), (0, h)),
+            "texCoord": ((0, 0), (1, 0), (1, 1), (0, 1)),
+        })
+        img_shader.bind()
+        img_shader.uniform_sampler("image", offs.texture_color)
+        batch.draw(img_shader)
+        gpu.state.blend_set('ALPHA')
 
     # Draw Transient Stroke (Current Drawing - not yet committed to props)
-    curr = RUNTIME_CACHE['current_stroke']
+    curr = RUNTIME_CACHE.current_stroke
     if curr:
         itype = curr['type']
         color = curr['color']
@@ -371,8 +1078,11 @@ def draw_callback():
         gpu.state.line_width_set(size if itype == 'STROKE' else float(size/2))
         
         if itype == 'STROKE':
-             points = [to_view(p) for p in curr['points']]
-             if len(points) > 1:
+             # Normally baked incrementally into the backdrop above; draw
+             # the whole strip live only when the offscreen is unavailable
+             if offs is None and len(curr['points']) > 1:
+                 # Same vectorized affine as the persistent strokes
+                 points = np.asarray(curr['points'], dtype=np.float32) * view_scale + view_offset
                  shader = get_shader()
                  shader.bind()
                  shader.uniform_float("color", color)
@@ -382,14 +1092,19 @@ def draw_callback():
              start = to_view(curr['start'])
              end = to_view(curr['end'])
              if itype == 'RECTANGLE': draw_rect(start, end, color, curr.get('fill', False))
-             elif itype == 'ELLIPSE': 
-                 s = Vector(start); e = Vector(end); 
-                 c = (s+e)/2; r = (s-e).length/2
-                 draw_circle(c, r, color, fill=curr.get('fill', False))
+             elif itype == 'ELLIPSE':
+                 dx = start[0] - end[0]; dy = start[1] - end[1]
+                 c = (0.5 * (start[0] + end[0]), 0.5 * (start[1] + end[1]))
+                 draw_circle(c, 0.5 * math.sqrt(dx * dx + dy * dy), color,
+                             fill=curr.get('fill', False))
              elif itype == 'ARROW': draw_arrow(start, end, color, size)
              elif itype == 'CROP': draw_rect(start, end, (1,1,1,0.5), False)
              elif itype == 'PIXELATE':
-                 draw_pixelate_rect(start, end, context.space_data.image, curr.get('pixelate_size', 10))
+                 # Direct draw while dragging: the rect changes every
+                 # MOUSEMOVE, so the offscreen cache would mint (and
+                 # abandon) an entry per event. Committed items go
+                 # through draw_pixelate_rect and get cached.
+                 _draw_pixelate_direct(start, end, context.space_data.image, curr.get('pixelate_size', 10))
 
     gpu.state.blend_set('NONE')
     gpu.state.line_width_set(1.0)
@@ -412,9 +1127,44 @@ def view_to_image(context, view_coord):
     except:
         return (0, 0)
 
+def make_view_to_image(context):
+    """Specialized view_to_image for a modal session: binds the view2d
+    region_to_view method once so per-event calls skip the
+    context.region.view2d attribute walk. The bound method reads live
+    view2d state, so it stays correct if the view changes mid-drag."""
+    region = context.region
+    if not region or not region.view2d:
+        return lambda view_coord: (0, 0)
+    region_to_view = region.view2d.region_to_view
+
+    def _v2i(view_coord):
+        try:
+            return region_to_view(view_coord[0], view_coord[1])
+        except:
+            return (0, 0)
+    return _v2i
+
+# Full-image quad batches for the bake paths, keyed by (w, h); repeated
+# bakes (batch export) reuse the batch and only rebind the texture.
+_BASE_IMAGE_BATCH_CACHE = {}
+
+def _draw_base_image(image, w, h):
+    shader = get_image_color_shader()
+    batch = _BASE_IMAGE_BATCH_CACHE.get((w, h))
+    if batch is None:
+        points = [(0, 0), (w, 0), (w, h), (0, h)]
+        tex_co = [(0, 0), (1, 0), (1, 1), (0, 1)]
+        batch = batch_for_shader(shader, 'TRI_FAN', {"pos": points, "texCoord": tex_co})
+        _BASE_IMAGE_BATCH_CACHE[(w, h)] = batch
+    shader.bind()
+    shader.uniform_sampler("image", get_cached_texture(image))
+    shader.uniform_float("color", (1, 1, 1, 1))
+    batch.draw(shader)
+
+
 def bake_stroke_to_offscreen(offscreen, image):
     strokes = bpy.context.scene.better_image_data.strokes
-    print(f"[BAKE] Found {len(strokes)} strokes in scene data")
+    if _DEBUG: print(f"[BAKE] Found {len(strokes)} strokes in scene data")
     w, h = image.size
     with offscreen.bind():
         try:
@@ -429,83 +1179,107 @@ def bake_stroke_to_offscreen(offscreen, image):
                 
                 gpu.state.blend_set('NONE')
                 try:
-                    # Blender 4.x: Use gpu.texture.from_image() and uniform_sampler
-                    texture = gpu.texture.from_image(image)
-                    shader = gpu.shader.from_builtin('IMAGE_COLOR')
-                    shader.bind()
-                    shader.uniform_sampler("image", texture)
-                    shader.uniform_float("color", (1, 1, 1, 1))
-                    points = [(0, 0), (w, 0), (w, h), (0, h)]
-                    tex_co = [(0, 0), (1, 0), (1, 1), (0, 1)]
-                    batch = batch_for_shader(shader, 'TRI_FAN', {"pos": points, "texCoord": tex_co})
-                    batch.draw(shader)
+                    # Blender 4.x: textured quad via the shared cached batch
+                    _draw_base_image(image, w, h)
                 except Exception as e: print(f"Error drawing image: {e}")
                 
                 gpu.state.blend_set('ALPHA')
-                # Iterate Scene Data
+                _blf_reset_state()
+                # Iterate Scene Data, accumulating lines per (color, width)
+                data = bpy.context.scene.better_image_data
+                line_groups = {}
                 for idx, item in enumerate(strokes):
                     itype = item.type
                     color = item.color
                     size = item.size
-                    print(f"[BAKE] Drawing stroke {idx}: type={itype}, color={color[:3]}, size={size}")
+                    if _DEBUG: print(f"[BAKE] Drawing stroke {idx}: type={itype}, color={color[:3]}, size={size}")
                     gpu.state.line_width_set(size if itype == 'STROKE' else float(size/2))
-                    
+
                     if itype == 'STROKE':
-                        points = [p.pos for p in item.points] 
-                        if len(points) < 2: continue
-                        shader = get_shader()
-                        shader.bind()
-                        shader.uniform_float("color", color)
-                        batch = batch_for_shader(shader, 'LINE_STRIP', {"pos": points})
-                        batch.draw(shader)
-                    elif itype == 'ARROW':
-                        draw_arrow(item.start_pos, item.end_pos, color, size)
-                    elif itype == 'RECTANGLE':
-                        draw_rect(item.start_pos, item.end_pos, color, item.is_filled)
-                    elif itype == 'ELLIPSE':
-                        start = Vector(item.start_pos)
-                        end = Vector(item.end_pos)
-                        center = (start + end) / 2
-                        radius = (start - end).length / 2
-                        draw_circle(center, radius, color, fill=item.is_filled)
-                    elif itype == 'TEXT':
-                        show_bg = getattr(item, 'text_show_bg', False)
-                        bg_col = getattr(item, 'text_bg_color', (0,0,0,0.5))
-                        show_shadow = getattr(item, 'text_show_shadow', False)
-                        shad_col = getattr(item, 'text_shadow_color', (0,0,0,1))
-                        draw_text(item.start_pos, item.text, item.size, color, item.is_emoji,
-                                  show_bg=show_bg, bg_color=bg_col, show_shadow=show_shadow, shadow_color=shad_col)
-                    elif itype == 'PIXELATE':
-                        draw_pixelate_rect(item.start_pos, item.end_pos, image, item.pixelate_size)
+                        arr = _get_stroke_positions(data, item)
+                        n = len(arr)
+                        if n < 2: continue
+                        seg = np.empty((2 * (n - 1), 2), dtype=np.float32)
+                        seg[0::2] = arr[:-1]
+                        seg[1::2] = arr[1:]
+                        line_groups.setdefault((tuple(color), size), []).append(seg)
+                    elif itype != 'CROP':
+                        seg = _outline_segments(item, _xf_identity)
+                        if seg is not None:
+                            line_groups.setdefault((tuple(color), float(size / 2)), []).append(seg)
+                        else:
+                            draw_fn = _DRAW_DISPATCH.get(itype)
+                            if draw_fn:
+                                draw_fn(item, _xf_identity, image)
+                _flush_line_groups(line_groups)
                 gpu.state.blend_set('NONE')
         except Exception as e:
             print(f"Bake Error: {e}")
 
+# Persistent bake/compose offscreen: allocating a 4K GPUOffScreen per
+# call is pure overhead when every bake of the same image needs the same
+# size. Single entry, replaced (and freed) when size or format changes.
+_BAKE_OFFSCREEN = {'key': None, 'offscreen': None}
+
+def _get_bake_offscreen(width, height, fmt):
+    key = (width, height, fmt)
+    if _BAKE_OFFSCREEN['key'] != key:
+        if _BAKE_OFFSCREEN['offscreen'] is not None:
+            _BAKE_OFFSCREEN['offscreen'].free()
+            _BAKE_OFFSCREEN['offscreen'] = None
+            _BAKE_OFFSCREEN['key'] = None
+        _BAKE_OFFSCREEN['offscreen'] = gpu.types.GPUOffScreen(width, height, format=fmt)
+        _BAKE_OFFSCREEN['key'] = key
+    return _BAKE_OFFSCREEN['offscreen']
+
 def bake_strokes_to_image(image):
     strokes = bpy.context.scene.better_image_data.strokes
     if len(strokes) == 0: return False
-    
+
     width, height = image.size
-    try: 
-        offscreen = gpu.types.GPUOffScreen(width, height, format='RGBA16F')
+    # 8-bit destinations don't benefit from an FP16 target; RGBA8 halves
+    # the GPU fill and readback bandwidth. Float images keep RGBA16F.
+    is_float = image.is_float
+    try:
+        offscreen = _get_bake_offscreen(width, height,
+                                        'RGBA16F' if is_float else 'RGBA8')
     except: return False
     
     bake_stroke_to_offscreen(offscreen, image)
-    
+
     try:
-        buffer = offscreen.texture_color.read()
-        image.pixels.foreach_set(buffer)
+        # Raw framebuffer read while bound: one contiguous buffer instead
+        # of texture_color.read()'s nested Buffer-of-rows structure.
+        with offscreen.bind():
+            fb = gpu.state.active_framebuffer_get()
+            if is_float:
+                buffer = fb.read_color(0, 0, width, height, 4, 0, 'FLOAT')
+                pixels = np.asarray(buffer, dtype=np.float32).ravel()
+            else:
+                buffer = fb.read_color(0, 0, width, height, 4, 0, 'UBYTE')
+                # image.pixels is float RNA either way; normalize in NumPy
+                pixels = np.asarray(buffer, dtype=np.uint8).ravel().astype(np.float32)
+                pixels *= 1.0 / 255.0
+        image.pixels.foreach_set(pixels)
     except Exception as e:
         print(f"Read Error: {e}")
         return False
         
-    bpy.context.scene.better_image_data.strokes.clear()
+    # Same invalidation as clear_strokes: the spatial grid and bbox
+    # caches key off strokes_version, and a stale selection would index
+    # into the now-empty collection
+    data = bpy.context.scene.better_image_data
+    data.strokes.clear()
+    data.strokes_version += 1
+    select_item(data, -1)
     return True
 
 def clear_strokes():
-    bpy.context.scene.better_image_data.strokes.clear()
-    RUNTIME_CACHE['current_stroke'] = None
-    RUNTIME_CACHE['selected_index'] = -1
+    data = bpy.context.scene.better_image_data
+    data.strokes.clear()
+    data.strokes_version += 1
+    RUNTIME_CACHE.current_stroke = None
+    select_item(data, -1)
 
 # Add item logic is now handled by Operators creating properties directly.
 # But we might need a helper:
@@ -537,26 +1311,29 @@ def add_stroke_from_runtime(stroke_dict):
     if 'pos' in stroke_dict: item.start_pos = stroke_dict['pos'] # Map 'pos' to 'start_pos' for TEXT
     
     if 'points' in stroke_dict:
-        pts = stroke_dict['points']
-        for p in pts:
-            new_pt = item.points.add()
-            new_pt.pos = p
-            
-    RUNTIME_CACHE['selected_index'] = len(strokes) - 1
+        set_points_np(item, stroke_dict['points'])
+
+    if item.type == 'ARROW':
+        update_arrow_head(item)
+
+    prev_version = data.strokes_version
+    data.strokes_version = prev_version + 1
+    _spatial_grid_insert(data, len(strokes) - 1, item, prev_version)
+    select_item(data, len(strokes) - 1)
 
 def get_composed_image_pixels(image):
     """
     Return pixels of Image + Annotations without modifying the original.
     Returns (pixels, width, height) or None.
     """
-    print(f"[CLIP] Starting get_composed_image_pixels for {image.name}")
+    if _DEBUG: print(f"[CLIP] Starting get_composed_image_pixels for {image.name}")
     strokes = bpy.context.scene.better_image_data.strokes
     width, height = image.size
-    print(f"[CLIP] Image size: {width}x{height}")
+    if _DEBUG: print(f"[CLIP] Image size: {width}x{height}")
     
-    try: 
-        offscreen = gpu.types.GPUOffScreen(width, height, format='RGBA8')
-        print(f"[CLIP] Offscreen created")
+    try:
+        offscreen = _get_bake_offscreen(width, height, 'RGBA8')
+        if _DEBUG: print(f"[CLIP] Offscreen ready")
     except Exception as e:
         print(f"[CLIP] Offscreen creation failed: {e}")
         return None
@@ -565,8 +1342,8 @@ def get_composed_image_pixels(image):
         # Do BAKE and READ in single bind to preserve strokes
         with offscreen.bind():
             # ------ BAKE PHASE ------
-            print(f"[BAKE] Starting bake_stroke_to_offscreen...")
-            print(f"[BAKE] Found {len(strokes)} strokes in scene data")
+            if _DEBUG: print(f"[BAKE] Starting bake_stroke_to_offscreen...")
+            if _DEBUG: print(f"[BAKE] Found {len(strokes)} strokes in scene data")
             
             with gpu.matrix.push_pop():
                 gpu.matrix.load_identity()
@@ -580,24 +1357,19 @@ def get_composed_image_pixels(image):
                 # Draw base image
                 gpu.state.blend_set('NONE')
                 try:
-                    texture = gpu.texture.from_image(image)
-                    shader = gpu.shader.from_builtin('IMAGE_COLOR')
-                    shader.bind()
-                    shader.uniform_sampler("image", texture)
-                    shader.uniform_float("color", (1, 1, 1, 1))
-                    points = [(0, 0), (width, 0), (width, height), (0, height)]
-                    tex_co = [(0, 0), (1, 0), (1, 1), (0, 1)]
-                    batch = batch_for_shader(shader, 'TRI_FAN', {"pos": points, "texCoord": tex_co})
-                    batch.draw(shader)
+                    _draw_base_image(image, width, height)
                 except Exception as e: print(f"Error drawing image: {e}")
                 
                 # Draw strokes on top
                 gpu.state.blend_set('ALPHA')
+                _blf_reset_state()
+                data = bpy.context.scene.better_image_data
+                line_groups = {}
                 for idx, item in enumerate(strokes):
                     itype = item.type
                     color = item.color
                     size = item.size
-                    print(f"[BAKE] Drawing stroke {idx}: type={itype}, color={color[:3]}, size={size}")
+                    if _DEBUG: print(f"[BAKE] Drawing stroke {idx}: type={itype}, color={color[:3]}, size={size}")
                     gpu.state.line_width_set(size if itype == 'STROKE' else float(size/2))
                     
                     # Helper to scale normalized coords (0-1) to pixel coords
@@ -605,70 +1377,46 @@ def get_composed_image_pixels(image):
                         return (pos[0] * width, pos[1] * height)
                     
                     if itype == 'STROKE':
-                        pts = [(p.pos[0] * width, p.pos[1] * height) for p in item.points] 
-                        if len(pts) < 2: continue
-                        print(f"[BAKE]   STROKE first point: {pts[0]}, last point: {pts[-1]}")
-                        stroke_shader = get_shader()
-                        stroke_shader.bind()
-                        stroke_shader.uniform_float("color", color)
-                        stroke_batch = batch_for_shader(stroke_shader, 'LINE_STRIP', {"pos": pts})
-                        stroke_batch.draw(stroke_shader)
-                    elif itype == 'ARROW':
-                        start_px = to_px(item.start_pos)
-                        end_px = to_px(item.end_pos)
-                        print(f"[BAKE]   ARROW start: {start_px}, end: {end_px}")
-                        draw_arrow(start_px, end_px, color, size)
-                    elif itype == 'RECTANGLE':
-                        draw_rect(to_px(item.start_pos), to_px(item.end_pos), color, item.is_filled)
-                    elif itype == 'ELLIPSE':
-                        start = Vector(to_px(item.start_pos))
-                        end = Vector(to_px(item.end_pos))
-                        center = (start + end) / 2
-                        radius = (start - end).length / 2
-                        draw_circle(center, radius, color, fill=item.is_filled)
-                    elif itype == 'TEXT':
-                        show_bg = getattr(item, 'text_show_bg', False)
-                        bg_col = getattr(item, 'text_bg_color', (0,0,0,0.5))
-                        show_shadow = getattr(item, 'text_show_shadow', False)
-                        shad_col = getattr(item, 'text_shadow_color', (0,0,0,1))
-                        draw_text(to_px(item.start_pos), item.text, item.size, color, item.is_emoji,
-                                  show_bg=show_bg, bg_color=bg_col, show_shadow=show_shadow, shadow_color=shad_col)
-                    elif itype == 'PIXELATE':
-                        draw_pixelate_rect(to_px(item.start_pos), to_px(item.end_pos), image, item.pixelate_size)
+                        pts = _get_stroke_positions(data, item) * (width, height)
+                        n = len(pts)
+                        if n < 2: continue
+                        if _DEBUG: print(f"[BAKE]   STROKE first point: {pts[0]}, last point: {pts[-1]}")
+                        seg = np.empty((2 * (n - 1), 2), dtype=np.float32)
+                        seg[0::2] = pts[:-1]
+                        seg[1::2] = pts[1:]
+                        line_groups.setdefault((tuple(color), size), []).append(seg)
+                    elif itype != 'CROP':
+                        seg = _outline_segments(item, to_px)
+                        if seg is not None:
+                            line_groups.setdefault((tuple(color), float(size / 2)), []).append(seg)
+                        else:
+                            draw_fn = _DRAW_DISPATCH.get(itype)
+                            if draw_fn:
+                                draw_fn(item, to_px, image)
+                _flush_line_groups(line_groups)
                 gpu.state.blend_set('NONE')
             
-            print(f"[BAKE] Bake completed")
+            if _DEBUG: print(f"[BAKE] Bake completed")
             
             # ------ READ PHASE (still bound!) ------
-            print(f"[READ] Offscreen still bound, reading framebuffer...")
+            if _DEBUG: print(f"[READ] Offscreen still bound, reading framebuffer...")
             fb = gpu.state.active_framebuffer_get()
             buffer = fb.read_color(0, 0, width, height, 4, 0, 'UBYTE')
-            print(f"[READ] Buffer read. len(buffer)={len(buffer)}")
-            
-            flat_pixels = []
-            for row in buffer:
-                if hasattr(row, 'to_list'):
-                    r_list = row.to_list()
-                elif hasattr(row, 'tolist'):
-                    r_list = row.tolist()
-                else:
-                    r_list = row
-                
-                if len(r_list) > 0 and isinstance(r_list[0], int):
-                    flat_pixels.extend(r_list)
-                else:
-                    for pixel in r_list:
-                         flat_pixels.extend(pixel)
-            
+            if _DEBUG: print(f"[READ] Buffer read. len(buffer)={len(buffer)}")
+
+            # One C-level flatten instead of extending a Python list per
+            # row/pixel (16M boxed ints on a 4K image).
+            arr = np.asarray(buffer, dtype=np.uint8).ravel()
+
             expected_len = width * height * 4
-            print(f"[READ] Flattened pixels: {len(flat_pixels)} (expected {expected_len})")
-            
-            if len(flat_pixels) != expected_len:
+            if _DEBUG: print(f"[READ] Flattened pixels: {arr.size} (expected {expected_len})")
+
+            if arr.size != expected_len:
                 print(f"[READ] ERROR: Size mismatch!")
                 return None
-                
-            print(f"[CLIP] Returning {len(flat_pixels)} pixels")
-            return flat_pixels, width, height
+
+            if _DEBUG: print(f"[CLIP] Returning {arr.size} pixels")
+            return arr, width, height
     except Exception as e:
         print(f"[READ] Exception: {e}")
         import traceback
@@ -676,21 +1424,53 @@ def get_composed_image_pixels(image):
         return None
 
 def delete_selected():
-    idx = RUNTIME_CACHE['selected_index']
-    strokes = bpy.context.scene.better_image_data.strokes
+    idx = RUNTIME_CACHE.selected_index
+    data = bpy.context.scene.better_image_data
+    strokes = data.strokes
     if idx != -1 and idx < len(strokes):
         strokes.remove(idx)
-        RUNTIME_CACHE['selected_index'] = -1
+        data.strokes_version += 1
+        select_item(data, -1)
         return True
     return False
 
 def erase_at(context, position, radius):
-    """Erase parts of strokes at position."""
+    """Queue an eraser dab at position. Dabs are applied in batch by
+    flush_erase_queue, so a high-polling-rate drag pays one stroke
+    rewrite per flush instead of one per mouse event."""
+    RUNTIME_CACHE.erase_queue.append(
+        (float(position[0]), float(position[1]), float(radius)))
+
+
+def flush_erase_queue(context):
+    """Apply all queued eraser dabs in one vectorized pass per stroke."""
+    queue = RUNTIME_CACHE.erase_queue
+    if not queue:
+        return
+    RUNTIME_CACHE.erase_queue = []
+
     data = context.scene.better_image_data
     strokes = data.strokes
-    
+    changed = False
+
+    dabs = np.asarray(queue, dtype=np.float32)  # (M, 3): x, y, radius
+    centers = dabs[:, :2]
+    radii2 = dabs[:, 2] ** 2
+
+    # Combined bounds of every dab for the coarse per-stroke reject
+    px0 = float((dabs[:, 0] - dabs[:, 2]).min())
+    px1 = float((dabs[:, 0] + dabs[:, 2]).max())
+    py0 = float((dabs[:, 1] - dabs[:, 2]).min())
+    py1 = float((dabs[:, 1] + dabs[:, 2]).max())
+
+    # Only visit strokes whose bounds intersect some eraser circle
+    candidates = set()
+    for x, y, r in queue:
+        candidates |= set(_query_spatial_grid(data, x - r, y - r,
+                                              x + r, y + r))
+
     # Iterate backwards to safely remove/split
-    for s_idx in range(len(strokes)-1, -1, -1):
+    for s_idx in sorted(candidates, reverse=True):
         stroke = strokes[s_idx]
         
         # Skip locked/hidden layers?
@@ -715,62 +1495,79 @@ def erase_at(context, position, radius):
              pass # For V1, Eraser only works on STROKES (Lines). Use Delete Selected for shapes.
              continue
         
-        # STROKE: Check points
-        points_to_remove = set()
-        
-        # Optimization: Bounding Box check first
-        # ...
-        
-        for p_idx, p in enumerate(stroke.points):
-            dist = (Vector(p.pos) - Vector(position)).length
-            if dist < radius:
-                points_to_remove.add(p_idx)
-        
-        if not points_to_remove: continue
-        
-        # Rebuild segments - CRITICAL SAFETY: Copy to Vector to detach from blender memory
-        original_points = [Vector(p.pos) for p in stroke.points]
+        # Bounding box check first (grid cells are coarser than the brush)
+        if stroke.bbox_valid and (stroke.bbox_max[0] < px0 or
+                                  stroke.bbox_min[0] > px1 or
+                                  stroke.bbox_max[1] < py0 or
+                                  stroke.bbox_min[1] > py1):
+            continue
+
+        # Squared-distance compare of every point against every queued
+        # dab at once: no Vector allocations, no sqrt, no Python loop
+        pts = _get_stroke_positions(data, stroke)
+        diff = pts[:, None, :] - centers[None, :, :]
+        dist2 = (diff * diff).sum(axis=-1)
+        keep = (dist2 >= radii2).all(axis=-1)
+
+        if keep.all(): continue
+
+        # Slice the kept runs out of pts. diff flags every transition
+        # between erased and kept, so the splits alternate; we keep
+        # whichever runs start with a kept point. pts is detached from
+        # Blender memory (the position cache owns its own array copy).
+        boundaries = np.flatnonzero(np.diff(keep.astype(np.int8)) != 0) + 1
         segments = []
-        current_segment = []
-        for i, pos in enumerate(original_points):
-            if i in points_to_remove:
-                if len(current_segment) > 0:
-                    segments.append(current_segment)
-                    current_segment = []
-            else:
-                current_segment.append(pos)
-        if len(current_segment) > 0: segments.append(current_segment)
-        
+        start = 0
+        for end in list(boundaries) + [len(keep)]:
+            if keep[start]:
+                segments.append(pts[start:end])
+            start = end
+
         # Apply changes
+        changed = True
         if not segments:
             strokes.remove(s_idx)
         else:
             # Replace current stroke with Segment 0
-            stroke.points.clear()
-            for p in segments[0]:
-                np = stroke.points.add()
-                np.pos = p
-            
+            set_points_np(stroke, segments[0])
+
             # Create new strokes for other segments
             for seg in segments[1:]:
                 # Check min length? 1 point strokes are invisible
                 if len(seg) < 2: continue
-                
+
                 new_s = strokes.add()
                 new_s.type = stroke.type
                 new_s.color = stroke.color
                 new_s.size = stroke.size
                 new_s.layer_id = stroke.layer_id
-                for p in seg:
-                    np = new_s.points.add()
-                    np.pos = p
+                set_points_np(new_s, seg)
+
+    if changed:
+        data.strokes_version += 1
 
 def register():
     global _draw_handler
     _draw_handler = bpy.types.SpaceImageEditor.draw_handler_add(draw_callback, (), 'WINDOW', 'POST_PIXEL')
+    bpy.app.handlers.depsgraph_update_post.append(_on_depsgraph_update)
+    warmup_shaders()
 
 def unregister():
     global _draw_handler
     if _draw_handler:
         bpy.types.SpaceImageEditor.draw_handler_remove(_draw_handler, 'WINDOW')
         _draw_handler = None
+    if _on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_on_depsgraph_update)
+    _TEX_CACHE.clear()
+    if RUNTIME_CACHE.backdrop is not None:
+        RUNTIME_CACHE.backdrop.free()
+        RUNTIME_CACHE.backdrop = None
+        RUNTIME_CACHE.backdrop_key = None
+    if _BAKE_OFFSCREEN['offscreen'] is not None:
+        _BAKE_OFFSCREEN['offscreen'].free()
+        _BAKE_OFFSCREEN['offscreen'] = None
+        _BAKE_OFFSCREEN['key'] = None
+    _GROUP_BATCH_CACHE['batches'] = []
+    _GROUP_BATCH_CACHE['others'] = []
+    _GROUP_BATCH_CACHE['key'] = None
@@ -4,12 +4,76 @@ Operators for betterimageeditor.
 
 import bpy
 import os
+import queue
+import struct
+import tempfile
+import threading
+import time
+import numpy as np
 from bpy.types import Operator
 from bpy.props import StringProperty
 from . import clipboard
 from . import drawing
+from . import simple_gif
 from mathutils import Vector
 
+# Named type sets for the hot membership tests in BETTERIMG_OT_draw_tool;
+# one shared constant per concept instead of a literal per branch.
+_STROKE_TOOLS = frozenset({'DRAW', 'HIGHLIGHT'})
+_MOVABLE_SHAPES = frozenset({'RECTANGLE', 'ELLIPSE', 'ARROW', 'CROP'})
+_DRAG_SHAPES = frozenset({'RECTANGLE', 'ELLIPSE', 'ARROW', 'CROP', 'PIXELATE'})
+
+# State of the last screen recording, shared by the record and export
+# operators (the export may run long after the modal recorder finished).
+_GIF_RECORD = {'dir': None, 'fps': 10}
+
+# Scratch buffer for whole-image pixel reads, reused across operator
+# invocations so a crop on the same-size image doesn't reallocate.
+_PIXEL_SCRATCH = {'shape': None, 'buf': None}
+
+def _read_pixels(image):
+    """image.pixels as an (h, w, 4) float32 view over a reused buffer."""
+    w, h = image.size
+    if _PIXEL_SCRATCH['shape'] != (w, h):
+        _PIXEL_SCRATCH['buf'] = np.empty(w * h * 4, dtype=np.float32)
+        _PIXEL_SCRATCH['shape'] = (w, h)
+    buf = _PIXEL_SCRATCH['buf']
+    image.pixels.foreach_get(buf)
+    return buf.reshape(h, w, 4)
+
+def _write_pixels(image, arr):
+    image.pixels.foreach_set(np.ascontiguousarray(arr, dtype=np.float32).ravel())
+
+def _throttled_redraw(context):
+    """tag_redraw coalesced to ~60Hz: high-polling-rate mice deliver far
+    more MOUSEMOVEs than the display can show, and each tag repaints the
+    whole region. State updates still happen per event; only the repaint
+    is deferred."""
+    now = time.perf_counter()
+    if now - drawing.RUNTIME_CACHE.last_redraw_time >= 1.0 / 60.0:
+        drawing.RUNTIME_CACHE.last_redraw_time = now
+        context.area.tag_redraw()
+        return True
+    return False
+
+def _get_image_editor_space(context):
+    """Cached IMAGE_EDITOR space; scans context.screen.areas only when the
+    cached reference is stale (layout changed, area closed)."""
+    space = drawing.RUNTIME_CACHE.image_editor_space
+    if space is not None:
+        try:
+            if space.type == 'IMAGE_EDITOR':
+                return space
+        except ReferenceError:
+            pass
+    for area in context.screen.areas:
+        if area.type == 'IMAGE_EDITOR':
+            space = area.spaces.active
+            drawing.RUNTIME_CACHE.image_editor_space = space
+            return space
+    drawing.RUNTIME_CACHE.image_editor_space = None
+    return None
+
 # Reuse previous clipboard operators
 class BETTERIMG_OT_capture_screen(Operator):
     bl_idname = "better_image.capture_screen"
@@ -19,10 +83,8 @@ class BETTERIMG_OT_capture_screen(Operator):
         try:
             pixels, width, height = clipboard.capture_full_screen()
             image = clipboard.create_blender_image_from_pixels("Screenshot", pixels, width, height)
-            for area in context.screen.areas:
-                if area.type == 'IMAGE_EDITOR':
-                    area.spaces.active.image = image
-                    break
+            space = _get_image_editor_space(context)
+            if space: space.image = image
             return {'FINISHED'}
         except Exception as e:
             self.report({'ERROR'}, f"Error: {e}")
@@ -34,29 +96,16 @@ class BETTERIMG_OT_paste_from_clipboard(Operator):
     bl_options = {'REGISTER', 'UNDO'}
     def execute(self, context):
         try:
-            bmp_path = clipboard.get_clipboard_as_temp_bmp()
-            if not bmp_path: 
+            image = clipboard.paste_clipboard_image("Clipboard")
+            if not image:
                 self.report({'WARNING'}, "No image in clipboard")
                 return {'CANCELLED'}
-            
-            try:
-                image = bpy.data.images.load(bmp_path)
-                image.name = "Clipboard"
-                image.pack() 
-            except Exception as e:
-                self.report({'ERROR'}, f"Failed to load image: {e}")
-                return {'CANCELLED'}
-            finally:
-                if os.path.exists(bmp_path):
-                    try: os.remove(bmp_path)
-                    except: pass
-            
-            for area in context.screen.areas:
-                if area.type == 'IMAGE_EDITOR': 
-                    area.spaces.active.image = image
-            
+
+            space = _get_image_editor_space(context)
+            if space: space.image = image
+
             return {'FINISHED'}
-        except Exception as e: 
+        except Exception as e:
             self.report({'ERROR'}, f"Paste Error: {e}")
             return {'CANCELLED'}
 
@@ -85,6 +134,174 @@ class BETTERIMG_OT_copy_to_clipboard(Operator):
             self.report({'ERROR'}, "Failed to copy")
             return {'CANCELLED'}
 
+class BETTERIMG_OT_record_gif(Operator):
+    """Record the screen as BMP frames for GIF export (ESC to stop)"""
+    bl_idname = "better_image.record_gif"
+    bl_label = "Record GIF"
+
+    _timer = None
+    _frame_count = 0
+
+    # Disk writes happen off the UI thread: the timer callback only
+    # captures into a pooled buffer and enqueues it; a daemon worker
+    # does the BMP encode + write. The bounded queue doubles as
+    # backpressure — a slow disk throttles capture instead of piling
+    # up frames unboundedly.
+    _MAX_PENDING = 8
+    _write_q = None
+    _free_bufs = None
+    _writer = None
+    _write_error = None
+
+    def execute(self, context):
+        props = context.scene.better_image_editor
+        if props.is_recording:
+            return {'CANCELLED'}
+        self.start_recording(context)
+        context.window_manager.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def start_recording(self, context):
+        props = context.scene.better_image_editor
+        _GIF_RECORD['dir'] = tempfile.mkdtemp(prefix='bie_gif_')
+        _GIF_RECORD['fps'] = props.gif_fps
+        self._frame_count = 0
+        self._n_bufs = 0
+        self._write_q = queue.Queue(maxsize=self._MAX_PENDING)
+        self._free_bufs = queue.Queue()
+        self._write_error = None
+        # In-memory mode skips the BMP round-trip entirely: frames go
+        # straight into the export cache and no writer thread is needed.
+        self._in_memory = props.keep_frames_in_memory
+        if self._in_memory:
+            self._writer = None
+        else:
+            self._writer = threading.Thread(
+                target=self._writer_loop, args=(_GIF_RECORD['dir'],),
+                daemon=True)
+            self._writer.start()
+        props.is_recording = True
+        self._timer = context.window_manager.event_timer_add(
+            1.0 / props.gif_fps, window=context.window)
+
+    def capture_frame(self):
+        # Buffers cycle through a small pool (capture -> write queue ->
+        # back to the pool), so steady-state recording still allocates
+        # nothing per frame.
+        try:
+            buf = self._free_bufs.get_nowait()
+        except queue.Empty:
+            if self._n_bufs < self._MAX_PENDING:
+                w = clipboard.user32.GetSystemMetrics(0)
+                h = clipboard.user32.GetSystemMetrics(1)
+                buf = np.empty((h, w, 4), dtype=np.uint8)
+                self._n_bufs += 1
+            else:
+                buf = self._free_bufs.get()
+        h, w = buf.shape[:2]
+        frame, w, h = clipboard.get_screen_region_into(0, 0, w, h, buf)
+        if self._in_memory:
+            simple_gif.cache_frame(_GIF_RECORD['dir'], self._frame_count,
+                                   frame.tobytes(), w, h)
+            self._free_bufs.put(buf)
+        else:
+            self._write_q.put((frame, w, h, self._frame_count))
+        self._frame_count += 1
+
+    def _writer_loop(self, dirname):
+        while True:
+            item = self._write_q.get()
+            if item is None:
+                break
+            buf, w, h, idx = item
+            try:
+                path = os.path.join(dirname, 'frame_%05d.bmp' % idx)
+                # GDI hands back BGRA, which is BMP's native order: no
+                # swap on either side of the disk round-trip
+                simple_gif.write_bmp(path, buf, w, h, swap=False)
+            except Exception as e:
+                self._write_error = e
+            self._free_bufs.put(buf)
+
+    def stop_recording(self, context):
+        context.scene.better_image_editor.is_recording = False
+        if self._timer:
+            context.window_manager.event_timer_remove(self._timer)
+            self._timer = None
+        if self._writer:
+            self._write_q.put(None)
+            self._writer.join()
+            self._writer = None
+
+    def modal(self, context, event):
+        props = context.scene.better_image_editor
+        if event.type == 'ESC' or not props.is_recording:
+            self.stop_recording(context)
+            self.report({'INFO'}, f"Recorded {self._frame_count} frames")
+            return {'FINISHED'}
+        if event.type == 'TIMER':
+            try:
+                if self._write_error:
+                    raise self._write_error
+                self.capture_frame()
+            except Exception as e:
+                self.stop_recording(context)
+                self.report({'ERROR'}, f"Capture failed: {e}")
+                return {'CANCELLED'}
+        return {'PASS_THROUGH'}
+
+class BETTERIMG_OT_export_gif(Operator):
+    """Encode the last recording into an animated GIF"""
+    bl_idname = "better_image.export_gif"
+    bl_label = "Export GIF"
+    filepath: StringProperty(subtype='FILE_PATH', default="")
+
+    def execute(self, context):
+        dirname = _GIF_RECORD['dir']
+        if not dirname or not os.path.isdir(dirname):
+            self.report({'WARNING'}, "No recording to export")
+            return {'CANCELLED'}
+
+        # Same-process export: the recorder cached the raw frames as it
+        # wrote them, so skip the disk round-trip entirely.
+        cache = simple_gif.FRAME_CACHE
+        if cache['dir'] == dirname and cache['frames']:
+            frames = [cache['frames'][i] for i in sorted(cache['frames'])]
+            width, height = frames[0][1], frames[0][2]
+            encoder = simple_gif.GIFEncoder(width, height,
+                                            fps=_GIF_RECORD['fps'])
+            encoder.start(n_frames=len(frames))
+            for pixels, w, h in frames:
+                encoder.add_frame(pixels, w, h, is_bgra=True, bottom_up=True)
+        else:
+            # Cold path (add-on reloaded since recording): one directory
+            # scan; the zero-padded names sort back into capture order.
+            frames = sorted(
+                e.path for e in os.scandir(dirname)
+                if e.name.startswith('frame_') and e.name.endswith('.bmp'))
+            if not frames:
+                self.report({'WARNING'}, "No frames recorded")
+                return {'CANCELLED'}
+
+            # Dimensions from the first BMP info header: width and
+            # height are adjacent at offset 18, one read covers both
+            with open(frames[0], 'rb') as f:
+                f.seek(18)
+                width, height = struct.unpack('<Ii', f.read(8))
+                height = abs(height)
+
+            encoder = simple_gif.GIFEncoder(width, height,
+                                            fps=_GIF_RECORD['fps'])
+            encoder.start(n_frames=len(frames))
+            for path in frames:
+                encoder.add_frame_from_bmp(path)
+
+        out_path = self.filepath or os.path.join(
+            tempfile.gettempdir(), 'better_image_recording.gif')
+        encoder.finish(out_path)
+        self.report({'INFO'}, f"GIF saved: {out_path}")
+        return {'FINISHED'}
+
 class BETTERIMG_OT_draw_tool(Operator):
     """Universal tool invoked by Keymap (Left Click)"""
     bl_idname = "better_image.draw_tool"
@@ -94,7 +311,29 @@ class BETTERIMG_OT_draw_tool(Operator):
     _start_mouse = None
     _start_item_pos = None # For undo/delta calc
     _smooth_brush_pos = None # For stabilization (Screen Space Vector)
-    
+    _item_ref = None # MOVE target, resolved once at invoke
+    _v2i = None # view->image transform bound once per modal session
+
+    def _resolve_move_item(self, context):
+        """Return the stroke being moved, or None if it went away.
+
+        Uses the reference stashed at invoke; falls back to an index
+        lookup if the collection was mutated under us (ReferenceError).
+        """
+        item = self._item_ref
+        if item is not None:
+            try:
+                item.type  # probe: raises if the RNA pointer died
+                return item
+            except ReferenceError:
+                self._item_ref = None
+        idx = drawing.RUNTIME_CACHE.selected_index
+        strokes = context.scene.better_image_data.strokes
+        if 0 <= idx < len(strokes):
+            self._item_ref = strokes[idx]
+            return self._item_ref
+        return None
+
     def invoke(self, context, event):
         if context.area.type != 'IMAGE_EDITOR': return {'PASS_THROUGH'}
         if context.region.type != 'WINDOW': return {'PASS_THROUGH'}
@@ -105,28 +344,35 @@ class BETTERIMG_OT_draw_tool(Operator):
         if tool == 'NONE': return {'PASS_THROUGH'}
         
         mouse_pos = (event.mouse_region_x, event.mouse_region_y)
-        image_pos = drawing.view_to_image(context, mouse_pos)
-        
+        # Bind the view->image transform once for the whole modal session
+        self._v2i = drawing.make_view_to_image(context)
+        image_pos = self._v2i(mouse_pos)
+
         # 1. MOVE TOOL
         if tool == 'MOVE':
             idx = drawing.hit_test(context, mouse_pos)
             if idx == -1: 
                 return {'PASS_THROUGH'} 
             
-            drawing.RUNTIME_CACHE['selected_index'] = idx
-            
+            drawing.select_item(context.scene.better_image_data, idx)
+
             # Access PROPERTY object directly
             item = context.scene.better_image_data.strokes[idx]
+            # Resolve the RNA reference once; the drag loop reuses it
+            # instead of re-walking scene.better_image_data.strokes[idx]
+            # every mouse event
+            self._item_ref = item
             self._start_mouse = image_pos
             
             # Store initial state for delta calc
             # Different property names than V2 dict
             if item.type == 'STROKE':
-                # Store list of point positions (Vector2)
-                self._start_item_pos = [Vector(p.pos) for p in item.points]
+                # Snapshot point positions as one (N, 2) array: the drag
+                # loop shifts and writes them back in bulk
+                self._start_item_pos = drawing.get_points_np(item).copy()
             elif item.type == 'TEXT':
                 self._start_item_pos = Vector(item.start_pos)
-            elif item.type in {'RECTANGLE', 'ELLIPSE', 'ARROW', 'CROP'}:
+            elif item.type in _MOVABLE_SHAPES:
                 self._start_item_pos = (Vector(item.start_pos), Vector(item.end_pos))
                 
             props.is_drawing = True
@@ -143,6 +389,7 @@ class BETTERIMG_OT_draw_tool(Operator):
              props.is_drawing = True
              context.window_manager.modal_handler_add(self)
              drawing.erase_at(context, image_pos, props.brush_size)
+             drawing.flush_erase_queue(context)
              context.area.tag_redraw()
              return {'RUNNING_MODAL'}
             
@@ -150,7 +397,7 @@ class BETTERIMG_OT_draw_tool(Operator):
         else:
             props.is_drawing = True
             
-            item_type = 'STROKE' if tool in {'DRAW', 'HIGHLIGHT'} else tool
+            item_type = 'STROKE' if tool in _STROKE_TOOLS else tool
             if tool == 'HIGHLIGHT':
                 color = tuple(props.highlight_color)
                 size = props.highlight_size
@@ -175,6 +422,9 @@ class BETTERIMG_OT_draw_tool(Operator):
             
             if item_type == 'STROKE':
                 new_item['points'] = [image_pos]
+                # Min-distance gate for MOUSEMOVE samples: drop sub-pixel
+                # duplicates while the cursor is nearly stationary
+                self._min_step2 = max(1.0, size * 0.25) ** 2
             else:
                 new_item['start'] = image_pos
                 new_item['end'] = image_pos
@@ -183,19 +433,23 @@ class BETTERIMG_OT_draw_tool(Operator):
                 if tool == 'PIXELATE':
                     new_item['pixelate_size'] = props.pixelate_size
             
-            drawing.RUNTIME_CACHE['current_stroke'] = new_item
+            drawing.RUNTIME_CACHE.current_stroke = new_item
             
             context.window_manager.modal_handler_add(self)
             return {'RUNNING_MODAL'}
     
     def modal(self, context, event):
-        props = context.scene.better_image_editor
+        # Bind the hot attribute chains once per event; the body then
+        # runs on LOAD_FAST locals instead of repeated LOAD_ATTR chains
+        scene = context.scene
+        props = scene.better_image_editor
+        cache = drawing.RUNTIME_CACHE
         tool = props.active_tool
         
         # DRAG UPDATE
         if event.type == 'MOUSEMOVE':
             mouse_pos = (event.mouse_region_x, event.mouse_region_y)
-            image_pos = drawing.view_to_image(context, mouse_pos)
+            image_pos = self._v2i(mouse_pos)
             
             # Stabilization Logic
             smoothed_image_pos = image_pos
@@ -207,20 +461,21 @@ class BETTERIMG_OT_draw_tool(Operator):
                  new_pos = current.lerp(target, 1.0 - factor)
                  self._smooth_brush_pos = new_pos
                  # Convert smoothed screen pos to image pos
-                 smoothed_image_pos = drawing.view_to_image(context, (new_pos.x, new_pos.y))
+                 smoothed_image_pos = self._v2i((new_pos.x, new_pos.y))
             else:
                  self._smooth_brush_pos = Vector(mouse_pos)
             
             if tool == 'ERASER':
+                 # Dabs accumulate in the queue and are applied in one
+                 # vectorized pass per displayed frame
                  drawing.erase_at(context, smoothed_image_pos, props.brush_size)
-                 context.area.tag_redraw()
+                 if _throttled_redraw(context):
+                     drawing.flush_erase_queue(context)
                  return {'RUNNING_MODAL'}
             
             if tool == 'MOVE' and self._start_mouse and self._start_item_pos is not None:
-                idx = drawing.RUNTIME_CACHE['selected_index']
-                # Verify index validity
-                if idx >= 0 and idx < len(context.scene.better_image_data.strokes):
-                    item = context.scene.better_image_data.strokes[idx]
+                item = self._resolve_move_item(context)
+                if item is not None:
                     delta_x = image_pos[0] - self._start_mouse[0]
                     delta_y = image_pos[1] - self._start_mouse[1]
                     delta = Vector((delta_x, delta_y))
@@ -228,27 +483,36 @@ class BETTERIMG_OT_draw_tool(Operator):
                     # Direct Property Update
                     if item.type == 'TEXT':
                         item.start_pos = self._start_item_pos + delta
-                    elif item.type in {'RECTANGLE', 'ELLIPSE', 'ARROW', 'CROP'}:
+                    elif item.type in _MOVABLE_SHAPES:
                         s, e = self._start_item_pos
                         item.start_pos = s + delta
                         item.end_pos = e + delta
+                        if item.type == 'ARROW':
+                            drawing.update_arrow_head(item)
                     elif item.type == 'STROKE':
-                        # Bulk update points?
-                        # This loop could be slow for huge strokes, but fine for annotations
-                        for i, p_orig in enumerate(self._start_item_pos):
-                            if i < len(item.points):
-                                item.points[i].pos = p_orig + delta
-            
+                        # One SIMD add + one blob write per mouse move
+                        moved = self._start_item_pos + np.asarray(
+                            (delta_x, delta_y), dtype=np.float32)
+                        drawing.set_points_np(item, moved)
+                    # In-place move: no version counter bumps until release
+                    drawing.mark_backdrop_dirty()
+
             else:
                 # Update Transient Dict
-                item = drawing.RUNTIME_CACHE['current_stroke']
+                item = cache.current_stroke
                 if item:
                     if item['type'] == 'STROKE':
-                        item['points'].append(smoothed_image_pos)
-                    elif item['type'] in {'ARROW', 'RECTANGLE', 'ELLIPSE', 'CROP', 'PIXELATE'}:
+                        # Skip samples closer than the brush-relative
+                        # threshold to the last stored point
+                        last = item['points'][-1]
+                        dx = smoothed_image_pos[0] - last[0]
+                        dy = smoothed_image_pos[1] - last[1]
+                        if dx * dx + dy * dy >= self._min_step2:
+                            item['points'].append(smoothed_image_pos)
+                    elif item['type'] in _DRAG_SHAPES:
                         item['end'] = image_pos # Shapes use raw mouse for snapping? Or smoothed? Let's use raw for Shapes to avoid lag.
-                        
-            context.area.tag_redraw()
+
+            _throttled_redraw(context)
             return {'RUNNING_MODAL'}
         
         # FINISH
@@ -256,51 +520,71 @@ class BETTERIMG_OT_draw_tool(Operator):
             props.is_drawing = False
             self._start_mouse = None
             self._start_item_pos = None
-            
-            item = drawing.RUNTIME_CACHE['current_stroke']
+
+            # Apply any eraser dabs still waiting on the throttle gate
+            drawing.flush_erase_queue(context)
+
+            # A finished MOVE changed positions: refresh the cached bounds
+            # and let the spatial grid rebuild on next query
+            if tool == 'MOVE':
+                item = self._resolve_move_item(context)
+                if item is not None:
+                    if item.type == 'STROKE':
+                        drawing.update_stroke_bbox(item)
+                    scene.better_image_data.strokes_version += 1
+            self._item_ref = None
+
+            item = cache.current_stroke
             if item:
-                # Validate and Commit
+                # Validate and Commit. Squared-distance compare on raw
+                # floats: no Vector allocations, no sqrt.
                 valid = True
-                try:
-                    if item['type'] == 'STROKE':
-                         if len(item['points']) < 2: valid = False
-                    elif item['type'] in {'RECTANGLE', 'ELLIPSE', 'ARROW', 'CROP', 'PIXELATE'}:
-                        start = Vector(item['start'])
-                        end = Vector(item['end'])
-                        if (start - end).length < 0.1: valid = False
-                except:
-                    pass
-
-                if valid: 
+                if item['type'] == 'STROKE':
+                    valid = len(item['points']) >= 2
+                elif item['type'] in _DRAG_SHAPES:
+                    sx, sy = item['start']
+                    ex, ey = item['end']
+                    valid = (sx - ex) * (sx - ex) + (sy - ey) * (sy - ey) >= 0.01
+
+                if valid:
                     # Commit to Property System
                     drawing.add_stroke_from_runtime(item)
-                
-            drawing.RUNTIME_CACHE['current_stroke'] = None
+
+            # Transient tail segments were baked into the backdrop
+            drawing.mark_backdrop_dirty()
+            cache.current_stroke = None
             context.area.tag_redraw()
             return {'FINISHED'}
             
         # CANCEL
         elif event.type in {'RIGHTMOUSE', 'ESC'}:
             props.is_drawing = False
-            
+
+            # Erases already made during the drag stay applied (matches
+            # the old per-event behavior); flush the stragglers
+            drawing.flush_erase_queue(context)
+
             # Revert Move if active
             if tool == 'MOVE' and self._start_mouse and self._start_item_pos is not None:
-                idx = drawing.RUNTIME_CACHE['selected_index']
-                data = context.scene.better_image_data
-                if idx >= 0 and idx < len(data.strokes):
-                     item = data.strokes[idx]
+                data = scene.better_image_data
+                item = self._resolve_move_item(context)
+                if item is not None:
                      # Restore
                      if item.type == 'TEXT':
                          item.start_pos = self._start_item_pos
-                     elif item.type in {'RECTANGLE', 'ELLIPSE', 'ARROW', 'CROP'}:
+                     elif item.type in _MOVABLE_SHAPES:
                          item.start_pos = self._start_item_pos[0]
                          item.end_pos = self._start_item_pos[1]
+                         if item.type == 'ARROW':
+                             drawing.update_arrow_head(item)
                      elif item.type == 'STROKE':
-                         for i, p_orig in enumerate(self._start_item_pos):
-                             if i < len(item.points):
-                                 item.points[i].pos = p_orig
+                         drawing.set_points_np(item, self._start_item_pos)
+                     data.strokes_version += 1
+            self._item_ref = None
 
-            drawing.RUNTIME_CACHE['current_stroke'] = None
+            # Drop any transient tail baked into the backdrop
+            drawing.mark_backdrop_dirty()
+            cache.current_stroke = None
             context.area.tag_redraw()
             return {'CANCELLED'}
             
@@ -368,19 +652,23 @@ class BETTERIMG_OT_apply_crop(Operator):
         nw, nh = x_max - x_min, y_max - y_min
         if nw <= 0 or nh <= 0: return {'CANCELLED'}
         
-        old = list(image.pixels[:])
-        new_px = [0.0] * (nw * nh * 4)
-        for y in range(nh):
-            for x in range(nw):
-                src_i = ((y_min + y) * w + (x_min + x)) * 4
-                dst_i = (y * nw + x) * 4
-                new_px[dst_i:dst_i+4] = old[src_i:src_i+4]
-        
+        # Copy before scale() invalidates the view.
+        arr = _read_pixels(image)
+        if x_min == 0 and nw == w:
+            # Full-width crop (trim top/bottom): the kept rows are one
+            # contiguous block, so this is a single bulk memcpy
+            cropped = arr[y_min:y_max].copy()
+        else:
+            # Strided 2D slice: one C copy per row instead of a Python
+            # loop over every pixel
+            cropped = np.ascontiguousarray(arr[y_min:y_max, x_min:x_max, :])
+
         image.scale(nw, nh)
-        image.pixels = new_px
+        _write_pixels(image, cropped)
         
         # Remove Property
         strokes.remove(crop_idx)
+        context.scene.better_image_data.strokes_version += 1
         context.area.tag_redraw()
         return {'FINISHED'}
 
@@ -424,6 +712,7 @@ class BETTERIMG_OT_add_layer(Operator):
         layer = data.layers.add()
         layer.name = f"Layer {len(data.layers)}"
         data.active_layer_index = len(data.layers) - 1
+        data.layers_version += 1
         return {'FINISHED'}
 
 class BETTERIMG_OT_remove_layer(Operator):
@@ -437,6 +726,7 @@ class BETTERIMG_OT_remove_layer(Operator):
             data.layers.remove(idx)
             if data.active_layer_index >= len(data.layers):
                 data.active_layer_index = max(0, len(data.layers) - 1)
+            data.layers_version += 1
             return {'FINISHED'}
         return {'CANCELLED'}
 
@@ -469,6 +759,8 @@ classes = (
     BETTERIMG_OT_capture_screen,
     BETTERIMG_OT_paste_from_clipboard,
     BETTERIMG_OT_copy_to_clipboard,
+    BETTERIMG_OT_record_gif,
+    BETTERIMG_OT_export_gif,
     BETTERIMG_OT_draw_tool,
     BETTERIMG_OT_add_emoji,
     BETTERIMG_OT_delete_selected,
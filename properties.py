@@ -1,9 +1,6 @@
 import bpy
 from bpy.props import FloatVectorProperty, IntProperty, EnumProperty, BoolProperty
 
-class BetterImagePoint(bpy.types.PropertyGroup):
-    pos: FloatVectorProperty(name="Position", size=2)
-
 class BetterImageStroke(bpy.types.PropertyGroup):
     type: EnumProperty(
         name="Type",
@@ -18,12 +15,27 @@ class BetterImageStroke(bpy.types.PropertyGroup):
         ],
         default='STROKE'
     )
-    # Storing points for freehand stroke
-    points: bpy.props.CollectionProperty(type=BetterImagePoint)
-    
+    # Freehand stroke points as one packed little-endian float32 x,y blob
+    # (SoA): no PropertyGroup instance per point. Read/write through
+    # drawing.get_points_np / drawing.set_points_np, never directly.
+    points_blob: bpy.props.StringProperty(subtype='BYTE_STRING')
+
+    # Cached point bounds so hit testing doesn't rescan every point per
+    # mouse move. Maintained by drawing.update_stroke_bbox whenever the
+    # points collection is mutated.
+    bbox_min: FloatVectorProperty(name="Bounds Min", size=2)
+    bbox_max: FloatVectorProperty(name="Bounds Max", size=2)
+    bbox_valid: BoolProperty(default=False)
+
     # Start/End for Shapes (Vector2)
     start_pos: FloatVectorProperty(name="Start", size=2)
     end_pos: FloatVectorProperty(name="End", size=2)
+
+    # Cached arrow head triangle (image space), maintained by
+    # drawing.update_arrow_head so drawing skips the per-frame normalize.
+    head_p1: FloatVectorProperty(name="Head P1", size=2)
+    head_p2: FloatVectorProperty(name="Head P2", size=2)
+    head_valid: BoolProperty(default=False)
     
     color: FloatVectorProperty(name="Color", size=4, default=(1,0,0,1))
     size: IntProperty(name="Size", default=5)
@@ -42,15 +54,26 @@ class BetterImageStroke(bpy.types.PropertyGroup):
     
     pixelate_size: bpy.props.IntProperty(name="Pixel Size", default=10)
 
+def _layer_changed(self, context):
+    # Invalidates the visibility cache in drawing.draw_callback
+    context.scene.better_image_data.layers_version += 1
+
 class BetterImageLayer(bpy.types.PropertyGroup):
     name: bpy.props.StringProperty(name="Name", default="Layer")
-    is_visible: bpy.props.BoolProperty(name="Visible", default=True)
-    is_locked: bpy.props.BoolProperty(name="Locked", default=False)
+    is_visible: bpy.props.BoolProperty(name="Visible", default=True, update=_layer_changed)
+    is_locked: bpy.props.BoolProperty(name="Locked", default=False, update=_layer_changed)
 
 class BetterImageData(bpy.types.PropertyGroup):
     strokes: bpy.props.CollectionProperty(type=BetterImageStroke)
     layers: bpy.props.CollectionProperty(type=BetterImageLayer)
     active_layer_index: IntProperty(default=0)
+
+    # Bumped on every stroke add/remove/move so runtime caches (spatial
+    # grid in drawing.py) know when to rebuild.
+    strokes_version: IntProperty(default=0)
+
+    # Same idea for layer visibility/lock changes
+    layers_version: IntProperty(default=0)
     
     # Helper to clear
     def clear(self):
@@ -189,26 +212,46 @@ class BetterImageEditorProperties(bpy.types.PropertyGroup):
         description="Whether drawing mode is active"
     )
 
-    # Dynamic getter/setter for editing selected text
+    is_recording: BoolProperty(
+        name="Recording",
+        default=False,
+        description="Whether screen recording is active"
+    )
+
+    gif_fps: IntProperty(
+        name="GIF FPS",
+        default=10,
+        min=1,
+        max=30,
+        description="Frames per second for screen recording"
+    )
+
+    keep_frames_in_memory: BoolProperty(
+        name="Frames in Memory",
+        default=False,
+        description="Keep recorded frames in RAM instead of writing BMP files (no disk I/O while recording, but frames are lost on restart)"
+    )
+
+    # Dynamic getter/setter for editing selected text. Getters run on
+    # every panel redraw, so they read the mirror values maintained by
+    # drawing.select_item instead of walking RNA to the stroke each time.
     def get_selected_text(self):
         from . import drawing
-        idx = drawing.RUNTIME_CACHE['selected_index']
-        # Access via Scene Data
-        data = bpy.context.scene.better_image_data
-        if idx != -1 and idx < len(data.strokes):
-             item = data.strokes[idx]
-             if item.type == 'TEXT':
-                 return item.text
-        return ""
+        return drawing.RUNTIME_CACHE.selected_text
 
     def set_selected_text(self, value):
         from . import drawing
-        idx = drawing.RUNTIME_CACHE['selected_index']
+        idx = drawing.RUNTIME_CACHE.selected_index
         data = bpy.context.scene.better_image_data
         if idx != -1 and idx < len(data.strokes):
              item = data.strokes[idx]
              if item.type == 'TEXT':
                  item.text = value
+                 drawing.RUNTIME_CACHE.selected_text = value
+                 # Text length feeds the hit bounds; stale grid/bbox
+                 # caches would keep the pre-edit rectangle
+                 data.strokes_version += 1
+                 drawing.mark_backdrop_dirty()
                  if bpy.context.area: bpy.context.area.tag_redraw()
 
     selected_text: bpy.props.StringProperty(
@@ -220,20 +263,21 @@ class BetterImageEditorProperties(bpy.types.PropertyGroup):
 
     def get_selected_size(self):
         from . import drawing
-        idx = drawing.RUNTIME_CACHE['selected_index']
-        data = bpy.context.scene.better_image_data
-        if idx != -1 and idx < len(data.strokes):
-             item = data.strokes[idx]
-             return item.size
-        return 5
+        return drawing.RUNTIME_CACHE.selected_size
 
     def set_selected_size(self, value):
         from . import drawing
-        idx = drawing.RUNTIME_CACHE['selected_index']
+        idx = drawing.RUNTIME_CACHE.selected_index
         data = bpy.context.scene.better_image_data
         if idx != -1 and idx < len(data.strokes):
              item = data.strokes[idx]
              item.size = value
+             drawing.RUNTIME_CACHE.selected_size = value
+             if item.type == 'ARROW':
+                 drawing.update_arrow_head(item)
+             # Size feeds the hit bounds too (see set_selected_text)
+             data.strokes_version += 1
+             drawing.mark_backdrop_dirty()
              if bpy.context.area: bpy.context.area.tag_redraw()
 
     selected_item_size: IntProperty(
@@ -246,7 +290,6 @@ class BetterImageEditorProperties(bpy.types.PropertyGroup):
 
 
 classes = (
-    BetterImagePoint,
     BetterImageStroke,
     BetterImageLayer,
     BetterImageData,
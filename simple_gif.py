@@ -0,0 +1,452 @@
+"""
+Minimal GIF89a encoder and BMP frame writer for the screen recorder.
+
+Pure Python plus NumPy — no external image libraries. Frames are
+quantized to a fixed 216-color web cube (6 evenly spaced levels per
+channel) and compressed with standard GIF LZW.
+"""
+
+import mmap
+import struct
+import numpy as np
+
+# Optional Numba JIT for the per-pixel palette mapping; the encoder
+# works without it, it just maps frames slower.
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# 6 evenly spaced levels per channel -> 216-color cube
+LEVELS = (0, 51, 102, 153, 204, 255)
+
+# get_level for every possible channel value, precomputed once: palette
+# mapping becomes three O(1) table loads per pixel.
+_LEVEL_LUT = np.minimum((np.arange(256) + 25) // 51, 5).astype(np.uint8)
+
+# The global color table is fixed, so its on-disk form is too: the 216
+# cube entries plus black padding out to 256, ready to splice into the
+# header with one copy.
+_PALETTE_BYTES = bytes(
+    c for r in LEVELS for g in LEVELS for b in LEVELS for c in (r, g, b)
+) + b'\x00' * (256 - 216) * 3
+
+# Header layouts compiled once — struct.pack with a literal format
+# re-parses the format string on every call, and these run per frame.
+_BMP_FILE_HDR = struct.Struct('<2sIHHI')
+_BMP_INFO_HDR = struct.Struct('<IiiHHIIiiII')
+_BMP_DIMS = struct.Struct('<Ii')
+_GIF_SCREEN_HDR = struct.Struct('<6sHHBBB')
+_GIF_LOOP_EXT = struct.Struct('<2sB11sBBHB')
+_GIF_FRAME_HDR = struct.Struct('<2sBBHBBB4HB')
+
+# Cube index weights: palette index = 36r + 6g + b
+_CUBE_WEIGHTS = np.array([36, 6, 1], dtype=np.uint16)
+
+# Transparent palette index for frame diffing. Index 215 (white) is the
+# last color the quantizer can produce; the padding entries above it are
+# unreachable, so claiming one costs nothing.
+_TRANSPARENT_INDEX = 255
+
+# Raw BGRA frames of the most recent recording, kept so an in-process
+# export doesn't re-read every BMP it just wrote. Keyed by frame index;
+# 'dir' names the recording the frames belong to, and a new recording
+# evicts the old one. The BMPs on disk remain the fallback (add-on
+# reloaded, cache dropped).
+FRAME_CACHE = {'dir': None, 'frames': {}}
+
+
+def cache_frame(dirname, index, pixels, width, height):
+    """Remember one written frame for the in-memory export path."""
+    if FRAME_CACHE['dir'] != dirname:
+        FRAME_CACHE['dir'] = dirname
+        FRAME_CACHE['frames'] = {}
+    FRAME_CACHE['frames'][index] = (pixels, width, height)
+
+
+def get_level(v):
+    """Nearest palette level index (0..5) for one 8-bit channel value."""
+    return min((v + 25) // 51, 5)
+
+
+if njit is not None:
+    @njit(cache=True, boundscheck=False)
+    def _map_numba(pixels, ro, bo):
+        """Compiled per-pixel palette mapping over a flat uint8 buffer."""
+        n = pixels.size // 4
+        out = np.empty(n, dtype=np.uint16)
+        for i in range(n):
+            base = i * 4
+            r = min((pixels[base + ro] + 25) // 51, 5)
+            g = min((pixels[base + 1] + 25) // 51, 5)
+            b = min((pixels[base + bo] + 25) // 51, 5)
+            out[i] = r * 36 + g * 6 + b
+        return out
+else:
+    _map_numba = None
+
+
+def _lzw_core(indices, out):
+    """GIF LZW over a uint8 index array, writing packed bytes into out.
+
+    Returns the number of bytes written. Kept to the scalar/ndarray
+    subset Numba compiles so the njit'd copy below and this plain-Python
+    source are the same code; emit is inlined at each site for the same
+    reason. The string table is a direct-mapped array over the packed
+    (prefix << 8) | byte key space, with generation-tagged entries so a
+    table reset is one counter bump instead of a million-slot refill.
+    """
+    code_size = 9          # min code size 8 -> 9-bit codes to start
+    buf = 0
+    nbits = 0
+    n = 0
+
+    table = np.full(1 << 20, -1, dtype=np.int64)
+    base = 0               # current generation << 12
+    next_code = 258        # after clear (256) and end (257)
+
+    buf |= 256 << nbits    # clear code opens the stream
+    nbits += code_size
+    while nbits >= 8:
+        out[n] = buf & 0xFF
+        n += 1
+        buf >>= 8
+        nbits -= 8
+
+    pattern_code = -1
+    for i in range(indices.shape[0]):
+        b = int(indices[i])
+        if pattern_code < 0:
+            pattern_code = b
+            continue
+        key = (pattern_code << 8) | b
+        entry = table[key]
+        if entry >= base:
+            pattern_code = entry & 0xFFF
+            continue
+        buf |= pattern_code << nbits
+        nbits += code_size
+        while nbits >= 8:
+            out[n] = buf & 0xFF
+            n += 1
+            buf >>= 8
+            nbits -= 8
+        if next_code < 4096:
+            table[key] = base | next_code
+            if next_code == (1 << code_size) and code_size < 12:
+                code_size += 1
+            next_code += 1
+        else:
+            # Table full: signal the decoder to reset with us
+            buf |= 256 << nbits
+            nbits += code_size
+            while nbits >= 8:
+                out[n] = buf & 0xFF
+                n += 1
+                buf >>= 8
+                nbits -= 8
+            base += 1 << 12
+            next_code = 258
+            code_size = 9
+        pattern_code = b
+    if pattern_code >= 0:
+        buf |= pattern_code << nbits
+        nbits += code_size
+        while nbits >= 8:
+            out[n] = buf & 0xFF
+            n += 1
+            buf >>= 8
+            nbits -= 8
+    buf |= 257 << nbits    # end-of-information
+    nbits += code_size
+    while nbits >= 8:
+        out[n] = buf & 0xFF
+        n += 1
+        buf >>= 8
+        nbits -= 8
+    if nbits:
+        out[n] = buf & 0xFF
+        n += 1
+    return n
+
+
+if njit is not None:
+    _lzw_core_nb = njit(cache=True, boundscheck=False)(_lzw_core)
+else:
+    _lzw_core_nb = None
+
+
+def write_bmp(filepath, pixels, width, height, swap=True):
+    """Write a frame (bottom-up rows, bytes or uint8 ndarray) as a
+    32-bit BMP.
+
+    With swap=True the input is RGBA and the R<->B permutation to BMP's
+    native BGRA order is one NumPy fancy-index pass. Callers holding
+    native BGRA (GDI captures) pass swap=False and the pixels go to disk
+    untouched.
+    """
+    if isinstance(pixels, np.ndarray):
+        arr = pixels.reshape(-1, 4)
+    else:
+        arr = np.frombuffer(pixels, dtype=np.uint8).reshape(-1, 4)
+    if swap:
+        # Same uint32 rotate+byteswap identity as clipboard.swap_rb:
+        # NumPy lowers it to vectorized byte shuffles, where the fancy
+        # index [2, 1, 0, 3] was a gather per channel
+        u32 = np.ascontiguousarray(arr).reshape(-1).view(np.uint32)
+        arr = ((u32 << np.uint32(8)) | (u32 >> np.uint32(24)))\
+            .byteswap().view(np.uint8).reshape(-1, 4)
+
+    pixel_size = width * height * 4
+    header = _BMP_FILE_HDR.pack(b'BM', 54 + pixel_size, 0, 0, 54)
+    info = _BMP_INFO_HDR.pack(40, width, height, 1, 32, 0,
+                              pixel_size, 2835, 2835, 0, 0)
+    with open(filepath, 'wb') as f:
+        f.write(header)
+        f.write(info)
+        # Contiguous arrays go straight to the file through the buffer
+        # protocol — no tobytes() copy of the whole frame
+        f.write(np.ascontiguousarray(arr))
+
+
+class GIFEncoder:
+    """Incremental GIF89a writer: start() -> add_frame()* -> finish()."""
+
+    def __init__(self, width, height, fps=10):
+        self.width = width
+        self.height = height
+        self.delay = max(2, round(100 / fps))  # 1/100 s units
+        # Output goes through a write cursor into a pre-sized buffer
+        # that doubles when it runs out; bare bytearray += reallocates
+        # (and copies) far more often at recording sizes.
+        self.data = bytearray(1 << 16)
+        self._pos = 0
+        self._prev_indices = None
+
+    def _write(self, payload):
+        n = len(payload)
+        end = self._pos + n
+        if end > len(self.data):
+            self.data += bytes(max(end, len(self.data) * 2) - len(self.data))
+        self.data[self._pos:end] = payload
+        self._pos = end
+
+    def start(self, loop=0, n_frames=None):
+        """Header, logical screen descriptor, global palette, loop ext.
+
+        Callers that know the frame count up front (export) pass
+        n_frames to size the reservation; 1.125x the index payload
+        bounds the LZW expansion of one frame.
+        """
+        if n_frames:
+            # Reserving the theoretical maximum (every frame full and
+            # incompressible) runs to gigabytes at 4K, and with delta
+            # diffing the real output is a small fraction of it. A few
+            # frames' worth, capped outright, covers typical recordings;
+            # _write's doubling absorbs the pathological ones.
+            frame_cost = self.width * self.height * 9 // 8 + 40
+            est = min(13 + 768 + 19 + min(n_frames, 4) * frame_cost,
+                      1 << 26)
+            if est > len(self.data):
+                self.data = bytearray(est)
+        # Header + logical screen descriptor; 0xF7 = global color table
+        # present, 8 bits/channel, 256 entries
+        self._write(_GIF_SCREEN_HDR.pack(b'GIF89a',
+                                         self.width, self.height, 0xF7, 0, 0))
+        self._write(_PALETTE_BYTES)
+        # Netscape application extension: loop count (0 = forever)
+        self._write(_GIF_LOOP_EXT.pack(b'\x21\xFF', 11,
+                                       b'NETSCAPE2.0', 3, 1, loop, 0))
+
+    def _map_pixels_to_palette(self, pixels, is_bgra=False):
+        """Pure-Python fallback: palette index per pixel, as bytes."""
+        ro, bo = (2, 0) if is_bgra else (0, 2)
+        out = bytearray()
+        for i in range(0, len(pixels), 4):
+            r = pixels[i + ro]
+            g = pixels[i + 1]
+            b = pixels[i + bo]
+            out.append(get_level(r) * 36 + get_level(g) * 6 + get_level(b))
+        return bytes(out)
+
+    def _map_pixels_to_palette_numpy(self, pixels, is_bgra=False):
+        """Vectorized palette mapping; same result as the fallback."""
+        arr = np.frombuffer(pixels, dtype=np.uint8).reshape(-1, 4)
+        ro, bo = (2, 0) if is_bgra else (0, 2)
+        if _map_numba is not None:
+            return _map_numba(arr.ravel(), ro, bo).astype(np.uint8).tobytes()
+        # One LUT gather over all three channels at once, then a single
+        # (N, 3) @ (3,) matmul fuses the weight multiplies and adds —
+        # two temporaries instead of a per-channel array each for the
+        # gathers, the widens, and the multiplies.
+        lvl = _LEVEL_LUT[arr[:, [ro, 1, bo]]]
+        # Every cube index fits in uint8 (max 215): hand the LZW stage
+        # a bytes buffer it can iterate at C speed, not boxed ints
+        return (lvl.astype(np.uint16) @ _CUBE_WEIGHTS).astype(np.uint8).tobytes()
+
+    def _lzw_encode(self, indices):
+        """GIF-variant LZW over a bytes buffer of palette indices."""
+        if _lzw_core_nb is not None:
+            arr = np.frombuffer(indices, dtype=np.uint8)
+            # Worst case is one <=12-bit code per input byte plus the
+            # occasional clear code, so 2x input plus slack always fits
+            out = np.empty(arr.size * 2 + 16, dtype=np.uint8)
+            return out[:_lzw_core_nb(arr, out)].tobytes()
+        return self._lzw_encode_py(indices)
+
+    def _lzw_encode_py(self, indices):
+        """Pure-Python LZW used when Numba is unavailable."""
+        min_code_size = 8
+        clear = 1 << min_code_size  # 256
+        end = clear + 1             # 257
+        code_size = min_code_size + 1
+
+        # LSB-first bit accumulator: codes shift in at the top, whole
+        # bytes fall out the bottom. No per-bit Python objects.
+        out = bytearray()
+        buf = 0
+        nbits = 0
+
+        def emit(code, size):
+            nonlocal buf, nbits
+            buf |= code << nbits
+            nbits += size
+            while nbits >= 8:
+                out.append(buf & 0xFF)
+                buf >>= 8
+                nbits -= 8
+
+        # Patterns are tracked by their table code, not the byte string:
+        # a sequence extends as (prefix_code << 8) | next_byte, so every
+        # lookup hashes one small int and nothing is concatenated. Only
+        # multi-byte patterns live in the dict — a single byte is its
+        # own code, and keeping roots out avoids (0 << 8) | b colliding
+        # with the root entry for b.
+        def fresh_table():
+            return {}
+
+        table = fresh_table()
+        next_code = end + 1
+        emit(clear, code_size)
+        pattern_code = -1
+        for b in indices:
+            if pattern_code < 0:
+                pattern_code = b
+                continue
+            key = (pattern_code << 8) | b
+            entry = table.get(key)
+            if entry is not None:
+                pattern_code = entry
+                continue
+            emit(pattern_code, code_size)
+            if next_code < 4096:
+                table[key] = next_code
+                if next_code == (1 << code_size) and code_size < 12:
+                    code_size += 1
+                next_code += 1
+            else:
+                # Table full: signal the decoder to reset with us
+                emit(clear, code_size)
+                table = fresh_table()
+                next_code = end + 1
+                code_size = min_code_size + 1
+            pattern_code = b
+        if pattern_code >= 0:
+            emit(pattern_code, code_size)
+        emit(end, code_size)
+        if nbits:
+            out.append(buf & 0xFF)
+        return bytes(out)
+
+    def add_frame(self, pixels, width, height, is_bgra=False, bottom_up=False):
+        """Append one frame. pixels is flat RGBA (or BGRA) bytes;
+        bottom_up flips capture-order rows to GIF's top-down order."""
+        try:
+            indices = self._map_pixels_to_palette_numpy(pixels, is_bgra)
+        except Exception:
+            indices = self._map_pixels_to_palette(pixels, is_bgra)
+        curr = np.frombuffer(indices, dtype=np.uint8).reshape(height, width)
+        if bottom_up:
+            curr = curr[::-1]
+
+        # Screen recordings barely change between frames: with disposal
+        # "do not dispose" the previous frame stays on the canvas, so
+        # only the bounding rect of the delta needs encoding, with
+        # untouched pixels inside it marked transparent. Unchanged
+        # frames shrink to a single transparent pixel.
+        prev = self._prev_indices
+        if prev is not None and prev.shape == curr.shape:
+            diff = prev != curr
+            rows = np.flatnonzero(diff.any(axis=1))
+            if rows.size:
+                cols = np.flatnonzero(diff.any(axis=0))
+                y0, y1 = int(rows[0]), int(rows[-1]) + 1
+                x0, x1 = int(cols[0]), int(cols[-1]) + 1
+                sub = curr[y0:y1, x0:x1].copy()
+                sub[~diff[y0:y1, x0:x1]] = _TRANSPARENT_INDEX
+            else:
+                x0 = y0 = 0
+                x1 = y1 = 1
+                sub = np.full((1, 1), _TRANSPARENT_INDEX, dtype=np.uint8)
+            transparent = True
+        else:
+            x0 = y0 = 0
+            x1, y1 = width, height
+            sub = curr
+            transparent = False
+        self._prev_indices = curr
+
+        # Graphic control extension (disposal 1 "do not dispose", plus
+        # the transparency flag on diffed frames) and image descriptor
+        # for the delta rect, packed as one 18-byte write
+        self._write(_GIF_FRAME_HDR.pack(
+            b'\x21\xF9', 4, 0x04 | (0x01 if transparent else 0x00),
+            self.delay, _TRANSPARENT_INDEX if transparent else 0, 0,
+            0x2C, x0, y0, x1 - x0, y1 - y0, 0))
+
+        lzw = self._lzw_encode(np.ascontiguousarray(sub).tobytes())
+        # Sub-block stage sized exactly up front: min code size, a
+        # length byte per 255-byte block, the data, and the terminator
+        # (left as the zero-initialized last byte). One extend of
+        # self.data instead of two calls per block.
+        n = len(lzw)
+        blocks = -(-n // 255)
+        out = bytearray(1 + n + blocks + 1)
+        out[0] = 8  # LZW minimum code size
+        pos = 1
+        for i in range(0, n, 255):
+            chunk_len = min(255, n - i)
+            out[pos] = chunk_len
+            out[pos + 1:pos + 1 + chunk_len] = lzw[i:i + chunk_len]
+            pos += 1 + chunk_len
+        self._write(out)
+
+    def add_frame_from_bmp(self, filepath):
+        """Encode one frame straight out of a write_bmp file.
+
+        The file is mmapped and the pixel payload sliced at offset 54,
+        so the palette mapping reads the page cache in place — no
+        per-frame f.read() allocating the whole payload first.
+        """
+        with open(filepath, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            arr = None
+            try:
+                width, height = _BMP_DIMS.unpack_from(mm, 18)
+                bottom_up = height > 0
+                height = abs(height)
+                arr = np.frombuffer(mm, dtype=np.uint8, offset=54,
+                                    count=width * height * 4)
+                self.add_frame(arr, width, height,
+                               is_bgra=True, bottom_up=bottom_up)
+            finally:
+                # The ndarray holds a buffer export on the map; drop it
+                # or close() refuses
+                del arr
+                mm.close()
+
+    def finish(self, filepath):
+        """Write the trailer and flush everything to disk."""
+        self._write(b'\x3B')
+        with open(filepath, 'wb') as f:
+            f.write(memoryview(self.data)[:self._pos])
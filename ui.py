@@ -58,6 +58,16 @@ class BETTERIMG_PT_main_panel(Panel):
         row = box.row(align=True)
         row.operator("better_image.capture_screen", text="Screen", icon='DESKTOP')
         row.operator("better_image.paste_from_clipboard", text="Paste", icon='PASTEDOWN')
+
+        # Screen Recording
+        if props.is_recording:
+            box.label(text="Recording... (ESC to stop)", icon='REC')
+        else:
+            row = box.row(align=True)
+            row.operator("better_image.record_gif", text="Record", icon='REC')
+            row.operator("better_image.export_gif", text="Export GIF", icon='RENDER_ANIMATION')
+            box.prop(props, "gif_fps", text="FPS")
+            box.prop(props, "keep_frames_in_memory")
         
         layout.separator()
         